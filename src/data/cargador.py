@@ -0,0 +1,267 @@
+"""
+Cargador compartido de las tablas limpias (SEP, INEGI y catálogo).
+
+Cada notebook y cada proceso del pool leía y limpiaba los mismos CSV con
+pd.read_csv, así que N consumidores tenían N copias de los datos. Este
+módulo publica cada tabla limpia una sola vez como archivo Arrow IPC en
+data/interim/arrow/<tabla>_<entidad>.arrow y la abre con memoria mapeada:
+todos los procesos comparten las mismas páginas del archivo (una sola copia
+física en la caché del sistema operativo) y abrir una tabla no requiere
+parsear nada.
+
+El archivo guarda en sus metadatos el sha256 del CSV de origen (junto con
+su tamaño y fecha de modificación, para no volver a calcular el hash si el
+archivo no cambió) y la versión de la limpieza. Si el origen cambia, la
+tabla se vuelve a publicar en la siguiente apertura; si el CSV de origen ya
+no existe se abre lo publicado tal como está. La publicación escribe
+un temporal y lo renombra, así que los lectores que ya la tenían abierta
+siguen viendo la versión anterior sin errores.
+
+Uso en los notebooks:
+    from src.data.cargador import cargar_tabla
+    sep = cargar_tabla('sep')                    # Sonora por omisión
+    catalogo = cargar_tabla('catalogo', entidad='02')
+    inegi = cargar_tabla('inegi', columnas=['municipio', 'periodo', 'valor'])
+
+Publicar por adelantado:
+    python -m src.data.cargador sep inegi catalogo --entidad 26
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pandas as pd
+import pyarrow as pa
+from pathlib import Path
+
+from src.data.esquemas_911 import COLUMNAS_TEXTO
+from src.data.make_dataset import ENTIDAD_POR_DEFECTO, TAMANO_CHUNK_911, cargar_entidades, ruta_inegi_tidy
+
+# Obtener la ruta base del proyecto (dos niveles arriba del script)
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent.parent
+
+# Subir este número cuando cambie la limpieza para invalidar lo publicado
+VERSION_LIMPIEZA = 1
+
+# Columnas de texto que los notebooks normalizan a mayúsculas sin espacios
+COLUMNAS_NORMALIZADAS = {
+    'sep': ['n_municipi', 'nivel', 'control'],
+    'inegi': [],
+    'catalogo': [],
+}
+
+# Columnas numéricas no enteras de cada tabla; lo que no es texto en la SEP es entero
+COLUMNAS_DECIMALES = {
+    'sep': [],
+    'inegi': ['valor'],
+    'catalogo': ['latitud', 'longitud'],
+}
+
+
+def ruta_fuente(tabla, slug):
+    """
+    CSV de origen de cada tabla.
+    """
+    rutas = {
+        'sep': PROJECT_ROOT / 'data' / 'processed' / f'sep_datos_tidy_{slug}.csv',
+        'inegi': ruta_inegi_tidy(slug),
+        'catalogo': PROJECT_ROOT / 'data' / 'raw' / f'catalogo_escuelas_{slug}.csv',
+    }
+    return rutas[tabla]
+
+
+def ruta_publicada(tabla, slug):
+    """
+    Archivo Arrow IPC publicado de una tabla.
+    """
+    return PROJECT_ROOT / 'data' / 'interim' / 'arrow' / f'{tabla}_{slug}.arrow'
+
+
+# ============================================================================
+# SECCIÓN 1: LIMPIEZA Y ESQUEMA
+# ============================================================================
+
+def tipo_arrow(tabla, columna):
+    """
+    Tipo Arrow de una columna del CSV de origen.
+    """
+    if columna in COLUMNAS_DECIMALES[tabla]:
+        return pa.float64()
+    if tabla == 'sep' and columna not in COLUMNAS_TEXTO + ['periodo_escolar']:
+        return pa.int32()
+    return pa.string()
+
+
+def esquema_arrow(tabla, ruta):
+    """
+    Esquema Arrow fijo de una tabla, a partir del encabezado de su CSV.
+    Todos los bloques se escriben con este esquema.
+    """
+    encabezado = pd.read_csv(ruta, nrows=0).columns
+    return pa.schema([(columna, tipo_arrow(tabla, columna)) for columna in encabezado])
+
+
+def tipos_lectura(esquema):
+    """
+    dtype de pd.read_csv equivalente al esquema Arrow.
+    """
+    equivalencias = {pa.float64(): 'float64', pa.int32(): 'Int32', pa.string(): 'string'}
+    return {campo.name: equivalencias[campo.type] for campo in esquema}
+
+
+def limpiar_bloque(tabla, chunk):
+    """
+    Limpieza común que hacía cada notebook al cargar: espacios en los
+    textos y mayúsculas en municipio, nivel y control.
+    """
+    for columna in chunk.columns:
+        if chunk[columna].dtype == 'string':
+            chunk[columna] = chunk[columna].str.strip()
+    for columna in COLUMNAS_NORMALIZADAS[tabla]:
+        if columna in chunk.columns:
+            chunk[columna] = chunk[columna].str.upper()
+    return chunk
+
+
+# ============================================================================
+# SECCIÓN 2: PUBLICACIÓN
+# ============================================================================
+
+def huella_fuente(ruta):
+    """
+    sha256 del contenido de un archivo, leído por partes.
+    """
+    huella = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for parte in iter(lambda: f.read(1 << 20), b''):
+            huella.update(parte)
+    return huella.hexdigest()
+
+
+def leer_metadatos(ruta):
+    """
+    Metadatos de publicación de un archivo Arrow (o None si no existe o
+    está dañado). Solo lee el pie del archivo.
+    """
+    try:
+        with pa.memory_map(str(ruta), 'r') as fuente:
+            metadatos = pa.ipc.open_file(fuente).schema.metadata or {}
+        return json.loads(metadatos[b'publicacion'])
+    except (FileNotFoundError, KeyError, pa.ArrowInvalid):
+        return None
+
+
+def publicacion_vigente(ruta_arrow, ruta_csv):
+    """
+    Indica si lo publicado corresponde al CSV de origen actual. Si el
+    tamaño y la fecha coinciden no se recalcula el hash. Sin CSV de origen
+    lo publicado es lo único disponible y se considera vigente.
+    """
+    metadatos = leer_metadatos(ruta_arrow)
+    if metadatos is None:
+        return False
+    if not ruta_csv.exists():
+        print(f" -> Advertencia: No existe {ruta_csv}; se usa la tabla publicada en {ruta_arrow}.")
+        return True
+    if metadatos['version_limpieza'] != VERSION_LIMPIEZA:
+        return False
+
+    estado = ruta_csv.stat()
+    if (metadatos['tamano'], metadatos['modificado_ns']) == (estado.st_size, estado.st_mtime_ns):
+        return True
+    return metadatos['sha256'] == huella_fuente(ruta_csv)
+
+
+def publicar_tabla(tabla, entidad=ENTIDAD_POR_DEFECTO, tamano_chunk=TAMANO_CHUNK_911):
+    """
+    Limpia el CSV de origen por bloques y lo escribe como Arrow IPC, con
+    la huella del origen en los metadatos. Regresa la ruta publicada.
+    """
+    slug = cargar_entidades()[entidad]['slug']
+    ruta_csv = ruta_fuente(tabla, slug)
+    if not ruta_csv.exists():
+        origen = 'notebooks/1_transformacion_datos_inegi.ipynb' if tabla == 'inegi' else 'python -m src.data.make_dataset'
+        raise Exception(f"Error: No existe {ruta_csv}. Ejecuta primero {origen}")
+
+    print(f"Publicando '{tabla}' desde {ruta_csv.name}...")
+    estado = ruta_csv.stat()
+    publicacion = {
+        'fuente': ruta_csv.name,
+        'sha256': huella_fuente(ruta_csv),
+        'tamano': estado.st_size,
+        'modificado_ns': estado.st_mtime_ns,
+        'version_limpieza': VERSION_LIMPIEZA,
+    }
+
+    esquema = esquema_arrow(tabla, ruta_csv)
+    esquema = esquema.with_metadata({'publicacion': json.dumps(publicacion)})
+
+    ruta_arrow = ruta_publicada(tabla, slug)
+    ruta_arrow.parent.mkdir(parents=True, exist_ok=True)
+    ruta_tmp = ruta_arrow.with_name(f'{ruta_arrow.name}.{os.getpid()}.parcial')
+
+    filas = 0
+    lector = pd.read_csv(ruta_csv, chunksize=tamano_chunk, dtype=tipos_lectura(esquema))
+    with pa.OSFile(str(ruta_tmp), 'wb') as destino, pa.ipc.new_file(destino, esquema) as escritor:
+        for chunk in lector:
+            chunk = limpiar_bloque(tabla, chunk)
+            escritor.write_table(pa.Table.from_pandas(chunk, schema=esquema, preserve_index=False))
+            filas += len(chunk)
+
+    # El renombrado es atómico: quien ya la tenía abierta conserva la versión anterior
+    os.replace(ruta_tmp, ruta_arrow)
+    print(f" -> ✅ '{tabla}' publicada en: {ruta_arrow} ({filas} filas)")
+    return ruta_arrow
+
+
+# ============================================================================
+# SECCIÓN 3: APERTURA
+# ============================================================================
+
+def abrir_tabla(tabla, entidad=ENTIDAD_POR_DEFECTO, columnas=None):
+    """
+    Abre una tabla publicada como pyarrow.Table con memoria mapeada (sin
+    copiar los datos). La publica primero si no existe o si su origen
+    cambió.
+    """
+    slug = cargar_entidades()[entidad]['slug']
+    ruta_arrow = ruta_publicada(tabla, slug)
+    if not publicacion_vigente(ruta_arrow, ruta_fuente(tabla, slug)):
+        publicar_tabla(tabla, entidad)
+
+    with pa.memory_map(str(ruta_arrow), 'r') as fuente:
+        datos = pa.ipc.open_file(fuente).read_all()
+
+    if columnas is not None:
+        datos = datos.select(columnas)
+    return datos
+
+
+def cargar_tabla(tabla, entidad=ENTIDAD_POR_DEFECTO, columnas=None):
+    """
+    Igual que abrir_tabla() pero como DataFrame. Las columnas usan tipos
+    respaldados por Arrow (pd.ArrowDtype), de modo que siguen apuntando a
+    la memoria mapeada en lugar de copiarse.
+    """
+    return abrir_tabla(tabla, entidad, columnas).to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publica las tablas limpias como Arrow IPC.")
+    parser.add_argument('tablas', nargs='+', choices=['sep', 'inegi', 'catalogo'],
+                        help="Tablas a publicar.")
+    parser.add_argument('--entidad', default=ENTIDAD_POR_DEFECTO,
+                        help="Clave de la entidad (por omisión, Sonora).")
+    argumentos = parser.parse_args()
+
+    for tabla in argumentos.tablas:
+        try:
+            abrir_tabla(tabla, argumentos.entidad.zfill(2))
+        except Exception as e:
+            print(f"❌ Ocurrió un error al publicar '{tabla}': {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Registro de esquemas del Formato 911 por ciclo escolar.
+
+Los archivos de cada ciclo no son idénticos: el de 2023-2024 viene de otro
+archivo (ESTANDAR_BASICA_I2324.csv), los nombres de columna cambian de
+mayúsculas/minúsculas y algunos valores se codifican distinto (p. ej.
+'PUBLICO' contra 'PÚBLICO'). Concatenar los ciclos sin más produce una
+unión de columnas medio vacías.
+
+El esquema canónico son las columnas de references/diccionario_datos_formato_911.csv
+más 'periodo_escolar'. Para cada ciclo se declaran alias de columnas y
+recodificaciones de valores; compilar_esquema() convierte esa declaración en
+los argumentos de pd.read_csv (usecols/dtype) y en un paso de recodificación,
+de modo que cada bloque sale del lector ya proyectado, renombrado y tipado.
+"""
+
+import pandas as pd
+from pathlib import Path
+
+# Obtener la ruta base del proyecto (dos niveles arriba del script)
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent.parent
+
+# Columnas de texto del diccionario; el resto son claves o conteos enteros
+COLUMNAS_TEXTO = [
+    'n_entidad', 'n_municipi', 'n_localidad', 'domicilio', 'clavecct', 'n_cct',
+    'n_turno', 'tipo', 'nivel', 'subnivel', 'c_caracterizan2', 'control',
+    'subcontrol', 'periodo', 'tipo_org_docente', 'tipo_org_alumnos'
+]
+
+# Columnas de texto con pocos valores distintos; se guardan como categoría
+COLUMNAS_CATEGORICAS = [
+    'n_entidad', 'n_turno', 'tipo', 'nivel', 'subnivel', 'c_caracterizan2',
+    'control', 'subcontrol', 'periodo', 'tipo_org_docente', 'tipo_org_alumnos',
+    'periodo_escolar'
+]
+
+# Recodificaciones comunes a todos los ciclos (columna -> {valor_origen: valor_canónico})
+RECODIFICACIONES_COMUNES = {
+    'control': {
+        'PUBLICO': 'PÚBLICO',
+        'PÃBLICO': 'PÚBLICO',
+        'PÃ\x9aBLICO': 'PÚBLICO',
+    },
+    'tipo': {
+        'BÁSICA': 'BASICA',
+        'BÃSICA': 'BASICA',
+        'BÃ\x81SICA': 'BASICA',
+    },
+}
+
+# Declaración por ciclo:
+#   'alias':        {nombre_en_el_archivo: nombre_canónico}
+#   'recodificar':  {columna: {valor_origen: valor_canónico}} (se suma a las comunes)
+#   'periodo':      clave que trae la columna 'periodo' en el archivo; si no
+#                   es la canónica (ver periodo_canonico) se recodifica
+ESQUEMAS_CICLO = {
+    # Los dos primeros ciclos usan el año de inicio completo ('I2019')
+    '2019-2020': {'alias': {}, 'recodificar': {}, 'periodo': 'I2019'},
+    '2020-2021': {'alias': {}, 'recodificar': {}, 'periodo': 'I2020'},
+    '2021-2022': {'alias': {}, 'recodificar': {}, 'periodo': 'I2122'},
+    '2022-2023': {'alias': {}, 'recodificar': {}, 'periodo': 'I2223'},
+    # Viene del archivo ESTANDAR_BASICA_I2324.csv; sus diferencias de
+    # encabezado se resuelven aquí en 'alias' conforme aparezcan
+    '2023-2024': {'alias': {}, 'recodificar': {}, 'periodo': 'I2324'},
+}
+
+
+def cargar_columnas_canonicas():
+    """
+    Lee references/diccionario_datos_formato_911.csv y regresa la lista de
+    columnas canónicas (en minúsculas, en el orden del diccionario).
+    """
+    ruta_diccionario = PROJECT_ROOT / 'references' / 'diccionario_datos_formato_911.csv'
+
+    if not ruta_diccionario.exists():
+        raise Exception(f"Error: No se encontró el diccionario del Formato 911 en {ruta_diccionario}")
+
+    diccionario = pd.read_csv(ruta_diccionario)
+    return diccionario['NOMBRE'].str.strip().str.lower().tolist()
+
+
+def tipos_canonicos(columnas_canonicas):
+    """
+    Tipo de pandas de cada columna canónica: texto como 'string' y claves y
+    conteos como enteros de 32 bits con soporte para nulos.
+    """
+    return {
+        columna: 'string' if columna in COLUMNAS_TEXTO else 'Int32'
+        for columna in columnas_canonicas
+    }
+
+
+def periodo_canonico(ciclo):
+    """
+    Clave canónica de 'periodo' de un ciclo: 'I' + los dos últimos dígitos
+    de cada año ('2019-2020' -> 'I1920').
+    """
+    inicio, fin = ciclo.split('-')
+    return f'I{inicio[-2:]}{fin[-2:]}'
+
+
+def compilar_esquema(ciclo, encabezado, columnas_canonicas=None):
+    """
+    Compila el esquema de un ciclo contra el encabezado real de su archivo.
+
+    Regresa un diccionario con:
+      - 'read_csv':    argumentos usecols/dtype para pd.read_csv
+      - 'renombrar':   {nombre_en_el_archivo: nombre_canónico}
+      - 'recodificar': {columna: {valor_origen: valor_canónico}}
+      - 'faltantes':   columnas canónicas que el archivo no trae
+      - 'columnas':    orden final de las columnas
+      - 'ciclo', 'periodo' (clave canónica del ciclo)
+    """
+    if ciclo not in ESQUEMAS_CICLO:
+        raise ValueError(f"El ciclo {ciclo} no está registrado en ESQUEMAS_CICLO")
+
+    if columnas_canonicas is None:
+        columnas_canonicas = cargar_columnas_canonicas()
+
+    declaracion = ESQUEMAS_CICLO[ciclo]
+    tipos = tipos_canonicos(columnas_canonicas)
+
+    renombrar = {}
+    for nombre_origen in encabezado:
+        nombre = nombre_origen.strip().lower()
+        nombre = declaracion['alias'].get(nombre, nombre)
+        if nombre in tipos and nombre not in renombrar.values():
+            renombrar[nombre_origen] = nombre
+
+    recodificar = {columna: dict(mapa) for columna, mapa in RECODIFICACIONES_COMUNES.items()}
+    for columna, mapa in declaracion['recodificar'].items():
+        recodificar.setdefault(columna, {}).update(mapa)
+
+    periodo = periodo_canonico(ciclo)
+    if declaracion['periodo'] != periodo:
+        recodificar.setdefault('periodo', {})[declaracion['periodo']] = periodo
+
+    return {
+        'ciclo': ciclo,
+        'periodo': periodo,
+        'read_csv': {
+            'usecols': list(renombrar),
+            'dtype': {origen: tipos[canonico] for origen, canonico in renombrar.items()},
+        },
+        'renombrar': renombrar,
+        'recodificar': recodificar,
+        'faltantes': [columna for columna in columnas_canonicas if columna not in renombrar.values()],
+        'tipos': tipos,
+        'columnas': columnas_canonicas + ['periodo_escolar'],
+    }
+
+
+def compilar_esquema_archivo(ruta_csv, ciclo, columnas_canonicas=None):
+    """
+    Lee solo el encabezado de un archivo del Formato 911 y compila su esquema.
+    """
+    encabezado = pd.read_csv(ruta_csv, nrows=0).columns.tolist()
+    return compilar_esquema(ciclo, encabezado, columnas_canonicas)
+
+
+def aplicar_esquema(chunk, esquema):
+    """
+    Renombra, recodifica y completa un bloque leído con esquema['read_csv'].
+    El resultado tiene exactamente las columnas canónicas, con sus tipos.
+    """
+    chunk = chunk.rename(columns=esquema['renombrar'])
+
+    for columna in COLUMNAS_TEXTO:
+        if columna in chunk.columns:
+            chunk[columna] = chunk[columna].str.strip()
+
+    for columna, mapa in esquema['recodificar'].items():
+        if columna in chunk.columns:
+            chunk[columna] = chunk[columna].replace(mapa)
+
+    # Columnas del diccionario que este ciclo no publica: nulas pero tipadas
+    for columna in esquema['faltantes']:
+        chunk[columna] = pd.Series(pd.NA, index=chunk.index, dtype=esquema['tipos'][columna])
+
+    if 'periodo' in chunk.columns:
+        recodificar_periodo = esquema['recodificar'].get('periodo', {})
+        chunk['periodo'] = chunk['periodo'].str.upper().replace(recodificar_periodo).fillna(esquema['periodo'])
+    chunk['periodo_escolar'] = esquema['ciclo']
+
+    return chunk[esquema['columnas']]
+
+
+def leer_ciclo_911(ruta_csv, ciclo, tamano_chunk=None):
+    """
+    Lee un archivo del Formato 911 ya armonizado. Con `tamano_chunk` regresa
+    un iterador de bloques; sin él, un solo DataFrame.
+    """
+    esquema = compilar_esquema_archivo(ruta_csv, ciclo)
+
+    if esquema['faltantes']:
+        print(f" -> Advertencia: El ciclo {ciclo} no trae {len(esquema['faltantes'])} "
+              f"columnas del diccionario: {', '.join(esquema['faltantes'])}")
+
+    lector = pd.read_csv(ruta_csv, chunksize=tamano_chunk, **esquema['read_csv'])
+    if tamano_chunk is None:
+        return aplicar_esquema(lector, esquema)
+    return (aplicar_esquema(chunk, esquema) for chunk in lector)
+
+
+def combinar_ciclos(tablas):
+    """
+    Concatena tablas ya armonizadas de varios ciclos y convierte las columnas
+    de pocos valores a categoría. Como todas comparten esquema, el resultado
+    es denso y con tipos uniformes.
+    """
+    combinado = pd.concat(tablas, ignore_index=True)
+    for columna in COLUMNAS_CATEGORICAS:
+        combinado[columna] = combinado[columna].astype('category')
+    return combinado
@@ -0,0 +1,425 @@
+"""
+Almacén de instantáneas de los datos descargados (catálogo de escuelas e
+indicadores del INEGI).
+
+El catálogo cambia con el tiempo (por ejemplo 'c_estatus' cuando una
+escuela se da de baja), así que cada descarga se guarda como una
+instantánea fechada en lugar de sobrescribir la anterior. Para no guardar
+copias completas, cada archivo se corta en bloques definidos por su
+contenido:
+
+- Una huella rodante (gear hash) sobre una ventana de 32 bytes marca un
+  corte donde sus bits altos valen cero, y el corte se recorre al siguiente
+  salto de línea. Así los cortes dependen del contenido y no de la posición:
+  insertar o cambiar un renglón solo altera los bloques vecinos.
+- Cada bloque se guarda una sola vez, comprimido, con su sha256 como
+  nombre (data/raw/instantaneas/bloques/ab/abcdef...).
+- Cada descarga escribe un manifiesto con la lista ordenada de bloques
+  (data/raw/instantaneas/manifiestos/<archivo>/<fecha>.json).
+
+El espacio crece solo con los bytes que cambiaron. Cualquier instantánea se
+puede leer como flujo (abrir_instantanea() sirve directo a pd.read_csv), y
+como los bloques terminan en fin de renglón, comparar dos instantáneas de
+un CSV solo requiere leer los bloques que no comparten.
+
+Uso:
+    python -m src.data.instantaneas guardar data/raw/catalogo_escuelas_sonora.csv
+    python -m src.data.instantaneas listar raw/catalogo_escuelas_sonora.csv
+    python -m src.data.instantaneas comparar raw/catalogo_escuelas_sonora.csv 2025-01-10 2025-06-10
+    python -m src.data.instantaneas restaurar raw/catalogo_escuelas_sonora.csv 2025-01-10 salida.csv
+"""
+
+import argparse
+import datetime
+import hashlib
+import io
+import json
+import os
+import zlib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Obtener la ruta base del proyecto (dos niveles arriba del script)
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent.parent
+
+# Parámetros del corte por contenido (bloques de ~8 KiB en promedio)
+VENTANA = 32
+BITS_PROMEDIO = 13
+TAMANO_MINIMO = 2 * 1024
+TAMANO_MAXIMO = 64 * 1024
+TAMANO_LECTURA = 4 * 1024 * 1024
+
+# Un corte ocurre cuando los bits altos de la ventana valen cero
+MASCARA_CORTE = np.uint64(((1 << BITS_PROMEDIO) - 1) << (VENTANA - BITS_PROMEDIO))
+
+# Tabla fija de valores aleatorios por byte; cambiarla cambia todos los cortes
+TABLA_GEAR = np.random.default_rng(911).integers(0, 2 ** 63, size=256, dtype=np.uint64)
+
+SALTO_LINEA = ord('\n')
+
+
+def ruta_almacen():
+    """
+    Carpeta raíz del almacén de instantáneas.
+    """
+    return PROJECT_ROOT / 'data' / 'raw' / 'instantaneas'
+
+
+# ============================================================================
+# SECCIÓN 1: CORTE POR CONTENIDO
+# ============================================================================
+
+def huellas_rodantes(datos):
+    """
+    Huella gear de la ventana que termina en cada byte, calculada para todo
+    el arreglo a la vez: h[i] = sum_j TABLA[datos[i - j]] << j, j < VENTANA.
+    """
+    valores = TABLA_GEAR[datos]
+    huellas = valores.copy()
+    for j in range(1, VENTANA):
+        huellas[j:] += valores[:-j] << np.uint64(j)
+    return huellas
+
+
+def puntos_de_corte(datos, final=False):
+    """
+    Posiciones (exclusivas) donde cortar `datos`, un arreglo de bytes que
+    empieza en un límite de bloque. Si no es el final del archivo, lo que
+    queda después del último corte se junta con la siguiente lectura.
+    """
+    saltos = np.flatnonzero(datos == SALTO_LINEA) + 1
+    candidatos = np.flatnonzero((huellas_rodantes(datos) & MASCARA_CORTE) == 0) + 1
+
+    # Cada candidato se recorre al fin de su renglón
+    posicion = np.searchsorted(saltos, candidatos)
+    candidatos = np.unique(saltos[posicion[posicion < len(saltos)]])
+
+    cortes = []
+    inicio = 0
+    while True:
+        k = np.searchsorted(candidatos, inicio + TAMANO_MINIMO)
+        corte = int(candidatos[k]) if k < len(candidatos) else None
+
+        if corte is None or corte - inicio > TAMANO_MAXIMO:
+            if len(datos) - inicio <= TAMANO_MAXIMO:
+                break
+            # Bloque demasiado largo: se corta en el último renglón que cabe
+            k = np.searchsorted(saltos, inicio + TAMANO_MAXIMO, side='right') - 1
+            corte = int(saltos[k]) if k >= 0 and saltos[k] > inicio + TAMANO_MINIMO else inicio + TAMANO_MAXIMO
+
+        cortes.append(corte)
+        inicio = corte
+
+    if final and inicio < len(datos):
+        cortes.append(len(datos))
+    return cortes
+
+
+def cortar_en_bloques(flujo, tamano_lectura=TAMANO_LECTURA):
+    """
+    Lee un flujo binario por partes y genera sus bloques definidos por
+    contenido. La memoria queda acotada por el tamaño de lectura.
+    """
+    pendiente = b''
+    while True:
+        lectura = flujo.read(tamano_lectura)
+        final = not lectura
+        datos = pendiente + lectura
+        if not datos:
+            return
+
+        arreglo = np.frombuffer(datos, dtype=np.uint8)
+        inicio = 0
+        for corte in puntos_de_corte(arreglo, final=final):
+            yield datos[inicio:corte]
+            inicio = corte
+        pendiente = datos[inicio:]
+
+        if final:
+            return
+
+
+# ============================================================================
+# SECCIÓN 2: BLOQUES Y MANIFIESTOS
+# ============================================================================
+
+def ruta_bloque(huella):
+    """
+    Ruta de un bloque; se reparte en subcarpetas por los dos primeros
+    caracteres de la huella.
+    """
+    return ruta_almacen() / 'bloques' / huella[:2] / huella
+
+
+def guardar_bloque(bloque):
+    """
+    Guarda un bloque si todavía no existe y regresa su huella y si fue
+    nuevo. La escritura es atómica para que varios procesos puedan guardar
+    el mismo bloque a la vez.
+    """
+    huella = hashlib.sha256(bloque).hexdigest()
+    ruta = ruta_bloque(huella)
+    if ruta.exists():
+        return huella, False
+
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    ruta_tmp = ruta.with_name(f'{huella}.{os.getpid()}.parcial')
+    ruta_tmp.write_bytes(zlib.compress(bloque))
+    os.replace(ruta_tmp, ruta)
+    return huella, True
+
+
+def leer_bloque(huella):
+    """
+    Lee y descomprime un bloque.
+    """
+    return zlib.decompress(ruta_bloque(huella).read_bytes())
+
+
+def nombre_instantanea(ruta):
+    """
+    Nombre con el que se registra un archivo: su ruta relativa a data/
+    ('raw/catalogo_escuelas_sonora.csv').
+    """
+    ruta = Path(ruta).resolve()
+    try:
+        return ruta.relative_to(PROJECT_ROOT / 'data').as_posix()
+    except ValueError:
+        return ruta.name
+
+
+def ruta_manifiesto(nombre, fecha):
+    """
+    Ruta del manifiesto de un archivo en una fecha.
+    """
+    return ruta_almacen() / 'manifiestos' / nombre / f'{fecha}.json'
+
+
+def guardar_instantanea(ruta, nombre=None, fecha=None):
+    """
+    Registra el contenido actual de un archivo como la instantánea de
+    `fecha` (hoy por omisión). Solo se escriben los bloques nuevos; una
+    segunda descarga el mismo día reemplaza el manifiesto de ese día.
+    """
+    nombre = nombre or nombre_instantanea(ruta)
+    fecha = fecha or datetime.date.today().isoformat()
+
+    bloques = []
+    bytes_nuevos = 0
+    huella_total = hashlib.sha256()
+    with open(ruta, 'rb') as flujo:
+        for bloque in cortar_en_bloques(flujo):
+            huella, nuevo = guardar_bloque(bloque)
+            bloques.append([huella, len(bloque)])
+            bytes_nuevos += len(bloque) if nuevo else 0
+            huella_total.update(bloque)
+
+    manifiesto = {
+        'nombre': nombre,
+        'fecha': fecha,
+        'tamano': sum(tamano for _, tamano in bloques),
+        'sha256': huella_total.hexdigest(),
+        'bloques': bloques,
+    }
+
+    destino = ruta_manifiesto(nombre, fecha)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    with open(destino, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f)
+
+    print(f" -> ✅ Instantánea '{nombre}' del {fecha}: {len(bloques)} bloques, "
+          f"{bytes_nuevos} de {manifiesto['tamano']} bytes nuevos.")
+    return manifiesto
+
+
+def listar_instantaneas(nombre):
+    """
+    Fechas con instantánea de un archivo, de la más antigua a la más reciente.
+    """
+    carpeta = ruta_almacen() / 'manifiestos' / nombre
+    return sorted(ruta.stem for ruta in carpeta.glob('*.json'))
+
+
+def cargar_manifiesto(nombre, fecha=None):
+    """
+    Carga el manifiesto de una fecha (la más reciente si no se indica).
+    """
+    if fecha is None:
+        fechas = listar_instantaneas(nombre)
+        if not fechas:
+            raise Exception(f"Error: No hay instantáneas de '{nombre}'.")
+        fecha = fechas[-1]
+
+    ruta = ruta_manifiesto(nombre, fecha)
+    if not ruta.exists():
+        raise Exception(f"Error: No existe la instantánea de '{nombre}' del {fecha}.")
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# ============================================================================
+# SECCIÓN 3: LECTURA Y COMPARACIÓN
+# ============================================================================
+
+def leer_instantanea(nombre, fecha=None):
+    """
+    Genera los bytes de una instantánea bloque por bloque.
+    """
+    for huella, _ in cargar_manifiesto(nombre, fecha)['bloques']:
+        yield leer_bloque(huella)
+
+
+class _FlujoInstantanea(io.RawIOBase):
+    """
+    Adaptador de leer_instantanea() a un archivo binario de solo lectura.
+    """
+
+    def __init__(self, bloques):
+        self._bloques = bloques
+        self._resto = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        while not self._resto:
+            self._resto = next(self._bloques, None)
+            if self._resto is None:
+                self._resto = b''
+                return 0
+        n = min(len(destino), len(self._resto))
+        destino[:n] = self._resto[:n]
+        self._resto = self._resto[n:]
+        return n
+
+
+def abrir_instantanea(nombre, fecha=None):
+    """
+    Abre una instantánea como archivo binario, p. ej. para
+    pd.read_csv(abrir_instantanea(...), chunksize=...).
+    """
+    return io.BufferedReader(_FlujoInstantanea(leer_instantanea(nombre, fecha)))
+
+
+def restaurar_instantanea(nombre, fecha, destino):
+    """
+    Escribe una instantánea completa en `destino` y verifica su sha256.
+    """
+    manifiesto = cargar_manifiesto(nombre, fecha)
+    huella_total = hashlib.sha256()
+    with open(destino, 'wb') as f:
+        for huella, _ in manifiesto['bloques']:
+            bloque = leer_bloque(huella)
+            huella_total.update(bloque)
+            f.write(bloque)
+
+    if huella_total.hexdigest() != manifiesto['sha256']:
+        raise Exception(f"Error: La instantánea '{nombre}' del {manifiesto['fecha']} está dañada.")
+    print(f" -> ✅ Instantánea restaurada en: {destino}")
+
+
+def filas_de_bloques(huellas, encabezado, llave):
+    """
+    Lee como CSV solo los bloques indicados (todos terminan en fin de
+    renglón) y regresa sus filas indexadas por `llave`.
+    """
+    if not huellas:
+        return pd.DataFrame(columns=encabezado).set_index(llave)
+    contenido = b''.join(leer_bloque(huella) for huella in huellas)
+    filas = pd.read_csv(io.BytesIO(contenido), header=None, names=encabezado, dtype=str)
+    # Si el primer bloque cambió trae también el encabezado
+    filas = filas[filas[llave] != llave]
+    return filas.set_index(llave)
+
+
+def comparar_instantaneas(nombre, fecha_a, fecha_b, llave='cv_cct'):
+    """
+    Compara dos instantáneas de un CSV con una fila por `llave`.
+
+    Los bloques que comparten ambas instantáneas son idénticos, así que
+    solo se leen los bloques exclusivos de cada una. Regresa una tabla con
+    la llave, el tipo de cambio ('alta', 'baja', 'cambio') y las columnas
+    que cambiaron.
+    """
+    manifiesto_a = cargar_manifiesto(nombre, fecha_a)
+    manifiesto_b = cargar_manifiesto(nombre, fecha_b)
+    huellas_a = [huella for huella, _ in manifiesto_a['bloques']]
+    huellas_b = [huella for huella, _ in manifiesto_b['bloques']]
+
+    encabezado = list(pd.read_csv(abrir_instantanea(nombre, fecha_b), nrows=0).columns)
+
+    comunes = set(huellas_a) & set(huellas_b)
+    filas_a = filas_de_bloques([h for h in dict.fromkeys(huellas_a) if h not in comunes], encabezado, llave)
+    filas_b = filas_de_bloques([h for h in dict.fromkeys(huellas_b) if h not in comunes], encabezado, llave)
+
+    # Con llaves únicas, una fila de un bloque exclusivo no puede estar en un bloque común
+    bajas = filas_a.index.difference(filas_b.index)
+    altas = filas_b.index.difference(filas_a.index)
+    ambas = filas_a.index.intersection(filas_b.index)
+
+    distintas = filas_a.loc[ambas].fillna('') != filas_b.loc[ambas, filas_a.columns].fillna('')
+    distintas = distintas[distintas.any(axis=1)]
+    columnas = pd.Series(
+        [', '.join(distintas.columns[fila]) for fila in distintas.to_numpy()], index=distintas.index, dtype=object
+    )
+
+    diferencias = pd.concat([
+        pd.DataFrame({llave: altas, 'cambio': 'alta', 'columnas': ''}),
+        pd.DataFrame({llave: bajas, 'cambio': 'baja', 'columnas': ''}),
+        pd.DataFrame({llave: columnas.index, 'cambio': 'cambio', 'columnas': columnas.to_numpy()}),
+    ], ignore_index=True)
+
+    print(f" -> '{nombre}' {manifiesto_a['fecha']} -> {manifiesto_b['fecha']}: "
+          f"{len(altas)} altas, {len(bajas)} bajas, {len(columnas)} cambios "
+          f"({len(comunes)} bloques sin cambios).")
+    return diferencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Almacén de instantáneas de los datos descargados.")
+    acciones = parser.add_subparsers(dest='accion', required=True)
+
+    guardar = acciones.add_parser('guardar', help="Registra un archivo como instantánea.")
+    guardar.add_argument('ruta')
+    guardar.add_argument('--fecha', default=None, help="Fecha AAAA-MM-DD (hoy por omisión).")
+
+    listar = acciones.add_parser('listar', help="Lista las fechas de un archivo.")
+    listar.add_argument('nombre')
+
+    restaurar = acciones.add_parser('restaurar', help="Escribe una instantánea en un archivo.")
+    restaurar.add_argument('nombre')
+    restaurar.add_argument('fecha')
+    restaurar.add_argument('destino')
+
+    comparar = acciones.add_parser('comparar', help="Compara dos instantáneas de un CSV.")
+    comparar.add_argument('nombre')
+    comparar.add_argument('fecha_a')
+    comparar.add_argument('fecha_b')
+    comparar.add_argument('--llave', default='cv_cct', help="Columna que identifica cada fila.")
+    comparar.add_argument('--salida', default=None, help="CSV donde guardar las diferencias.")
+
+    argumentos = parser.parse_args()
+
+    try:
+        if argumentos.accion == 'guardar':
+            guardar_instantanea(argumentos.ruta, fecha=argumentos.fecha)
+        elif argumentos.accion == 'listar':
+            for fecha in listar_instantaneas(argumentos.nombre):
+                print(fecha)
+        elif argumentos.accion == 'restaurar':
+            restaurar_instantanea(argumentos.nombre, argumentos.fecha, argumentos.destino)
+        else:
+            diferencias = comparar_instantaneas(argumentos.nombre, argumentos.fecha_a,
+                                                argumentos.fecha_b, argumentos.llave)
+            if argumentos.salida:
+                diferencias.to_csv(argumentos.salida, index=False, encoding='utf-8')
+            else:
+                print(diferencias.to_string(index=False))
+    except Exception as e:
+        print(f"❌ Ocurrió un error con el almacén de instantáneas: {e}")
+
+
+if __name__ == "__main__":
+    main()
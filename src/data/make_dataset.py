@@ -1,16 +1,136 @@
+"""
+Script unificado para descargar datos de SEP e INEGI
+Descarga:
+1. Formato 911 (SEP) - Matrícula escolar por ciclo escolar
+2. Catálogo de escuelas por entidad federativa
+3. Indicadores municipales (INEGI)
+4. Indicadores de contexto estatales y nacionales (INEGI)
+
+Por omisión procesa Sonora (clave 26). Con --entidades o --todas procesa
+varias entidades en una sola corrida: los archivos nacionales del Formato 911
+se leen una sola vez y se reparten por entidad, y las descargas de cada
+entidad se ejecutan en paralelo en un pool de procesos.
+
+Por ahora solo Sonora tiene URL de catálogo en diccionario_entidades.json y
+diccionario de municipios (references/diccionario_municipios_<slug>.json).
+Las demás entidades obtienen el Formato 911 y los indicadores estatales,
+pero no el catálogo ni los indicadores municipales; al final de la corrida
+se imprime un resumen de las entidades incompletas.
+
+Con --streaming el Formato 911 no se guarda en data/raw: los cinco ciclos se
+descargan en paralelo y cada uno se filtra por entidad y columnas mientras
+llega, escribiendo solo los archivos por entidad.
+
+Al repartir, cada bloque pasa por las reglas de calidad de
+src/data/validacion.py y las filas con errores se apartan en
+data/interim/formato_911/<clave>/cuarentena_<ciclo>.csv en lugar de llegar
+a los archivos por entidad.
+
+Cada catálogo e indicador del INEGI descargado se registra además como
+instantánea fechada en data/raw/instantaneas (ver src/data/instantaneas.py).
+Con --refrescar se vuelven a descargar aunque ya existan, para acumular el
+historial sin perder las versiones anteriores.
+
+Uso:
+    python -m src.data.make_dataset
+    python -m src.data.make_dataset --entidades 26 02 25
+    python -m src.data.make_dataset --todas --procesos 8
+    python -m src.data.make_dataset --entidades 26 --streaming
+    python -m src.data.make_dataset --refrescar
+"""
+
+import argparse
+import csv
 import json
 import os
 import requests
 import pandas as pd
 import numpy as np
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from dotenv import load_dotenv
 
+from src.data.esquemas_911 import (
+    aplicar_esquema,
+    cargar_columnas_canonicas,
+    combinar_ciclos,
+    compilar_esquema,
+    compilar_esquema_archivo,
+    leer_ciclo_911,
+)
+from src.data.instantaneas import guardar_instantanea
+from src.data.validacion import apartar_invalidas, iniciar_validacion, resumir_validacion
+
 # Obtener la ruta base del proyecto (dos niveles arriba del script)
 SCRIPT_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = SCRIPT_DIR.parent.parent
 
+# Entidad que se procesa cuando no se indica otra (Sonora)
+ENTIDAD_POR_DEFECTO = '26'
+
+# Prefijo de las claves geográficas del API de indicadores del INEGI
+PREFIJO_GEO_ENTIDAD = '070000'
+CLAVE_GEO_NACIONAL = '0700'
+
+# Filas por bloque al leer los archivos nacionales del Formato 911
+TAMANO_CHUNK_911 = 200_000
+
+# Diccionario con los ciclos escolares y sus URLs
+ARCHIVOS_FORMATO_911 = {
+    '2019-2020': 'https://repodatos.atdt.gob.mx/s_educacion_publica/f911/BASICA_2019-2020.csv',
+    '2020-2021': 'https://repodatos.atdt.gob.mx/s_educacion_publica/f911/BASICA_2020-2021.csv',
+    '2021-2022': 'https://repodatos.atdt.gob.mx/s_educacion_publica/f911/BASICA_2021-2022.csv',
+    '2022-2023': 'https://repodatos.atdt.gob.mx/s_educacion_publica/f911/BASICA_2022-2023.csv',
+    '2023-2024': 'https://repodatos.atdt.gob.mx/s_educacion_publica/f911/ESTANDAR_BASICA_I2324.csv'
+}
+
+
+# ============================================================================
+# SECCIÓN 0: ENTIDADES FEDERATIVAS
+# ============================================================================
+
+def cargar_entidades():
+    """
+    Carga el diccionario de entidades federativas desde /references.
+    Regresa un diccionario {clave: {'nombre', 'slug', 'url_catalogo'}}.
+    """
+    ruta_entidades = PROJECT_ROOT / 'references' / 'diccionario_entidades.json'
+
+    if not ruta_entidades.exists():
+        raise Exception(f"Error: No se encontró el archivo {ruta_entidades}")
+
+    with open(ruta_entidades, 'r', encoding='utf-8') as f:
+        config_entidades = json.load(f)
+
+    return {entidad['clave']: entidad for entidad in config_entidades['entidades']}
+
+
+def clave_geo_entidad(clave_entidad):
+    """
+    Convierte la clave de entidad de la SEP ('26') a la clave geográfica
+    del API del INEGI ('07000026').
+    """
+    return PREFIJO_GEO_ENTIDAD + clave_entidad
+
+
+def ruta_external_entidad(slug):
+    """
+    Carpeta de data/external donde se guardan los indicadores de una entidad
+    (o 'nacional' para los indicadores que no dependen de la entidad).
+    """
+    ruta = PROJECT_ROOT / 'data' / 'external' / slug
+    ruta.mkdir(parents=True, exist_ok=True)
+    return ruta
+
+
+def ruta_inegi_tidy(slug):
+    """
+    Tabla tidy del INEGI de una entidad, como la escribe
+    1_transformacion_datos_inegi (por ahora solo existe la de Sonora).
+    """
+    return PROJECT_ROOT / 'data' / 'processed' / f'{slug}_educacion_tidy_inegi.csv'
+
 
 # ============================================================================
 # SECCIÓN 1: DESCARGA DE DATOS DE LA SEP
@@ -19,392 +139,276 @@ PROJECT_ROOT = SCRIPT_DIR.parent.parent
 def descargar_formato_911():
     """
     Descarga los archivos del Formato 911 de la SEP para educación básica.
-    El Formato 911 es el principal instrumento de recolección de datos del 
+    El Formato 911 es el principal instrumento de recolección de datos del
     sistema educativo en México.
     """
     print("=" * 70)
     print("INICIANDO DESCARGA DE DATOS DE LA SEP")
     print("=" * 70)
-    
-    # Diccionario con los ciclos escolares y sus URLs
-    archivos_a_descargar = {
-        '2019-2020': 'https://repodatos.atdt.gob.mx/s_educacion_publica/f911/BASICA_2019-2020.csv',
-        '2020-2021': 'https://repodatos.atdt.gob.mx/s_educacion_publica/f911/BASICA_2020-2021.csv',
-        '2021-2022': 'https://repodatos.atdt.gob.mx/s_educacion_publica/f911/BASICA_2021-2022.csv',
-        '2022-2023': 'https://repodatos.atdt.gob.mx/s_educacion_publica/f911/BASICA_2022-2023.csv',
-        '2023-2024': 'https://repodatos.atdt.gob.mx/s_educacion_publica/f911/ESTANDAR_BASICA_I2324.csv'
-    }
-    
+
     ruta = PROJECT_ROOT / 'data' / 'raw' / 'formato_911'
     ruta.mkdir(parents=True, exist_ok=True)
-    
+
     print("\n--- Descargando archivos del Formato 911 ---")
-    
-    for ciclo, url in archivos_a_descargar.items():
+
+    for ciclo, url in ARCHIVOS_FORMATO_911.items():
         nombre_archivo = f'formato_911_basica_{ciclo}.csv'
         ruta_guardado = ruta / nombre_archivo
-        
+
         if not ruta_guardado.exists():
             print(f"\nDescargando datos para el ciclo {ciclo}...")
             try:
                 response = requests.get(url, stream=True)
                 response.raise_for_status()
-                
+
                 with open(ruta_guardado, 'wb') as f:
                     for chunk in response.iter_content(chunk_size=8192):
                         f.write(chunk)
-                
+
                 print(f" -> ✅ Archivo guardado en: {ruta_guardado}")
-            
+
             except requests.exceptions.RequestException as e:
                 print(f" -> ❌ Error al descargar el archivo para el ciclo {ciclo}: {e}")
         else:
             print(f"\n✓ El archivo para el ciclo {ciclo} ya existe. Se omite.")
-    
+
     print("\n✅ Descarga del Formato 911 finalizada.")
 
 
-def descargar_catalogo_escuelas():
+def preparar_reparto(ciclo, claves_entidades):
     """
-    Descarga el catálogo de centros de trabajo (escuelas) del estado de Sonora.
+    Calcula los archivos por entidad de un ciclo que faltan por generar y
+    prepara sus temporales. Regresa (destinos, pendientes, temporales) o
+    None si el ciclo ya está repartido para todas las entidades.
     """
-    print("\n--- Descargando Catálogo de Centros de Trabajo (Escuelas) de Sonora ---")
-    
-    url_catalogo = 'https://www.datos.gob.mx/dataset/2a1d047c-546b-4293-971a-c835689a37a5/resource/4f013342-5028-447f-b39d-1c08f09f47f3/download/catalogo_centro_trabajo_26_csv.csv'
-    ruta_raw = PROJECT_ROOT / 'data' / 'raw'
-    nombre_archivo = 'catalogo_escuelas_sonora.csv'
-    ruta_guardado = ruta_raw / nombre_archivo
-    
-    ruta_raw.mkdir(parents=True, exist_ok=True)
-    
-    if not ruta_guardado.exists():
-        try:
-            df_catalogo = pd.read_csv(url_catalogo, encoding='latin1', low_memory=False)
-            df_catalogo.to_csv(ruta_guardado, index=False, encoding='utf-8')
-            
-            print(f"✅ Catálogo de escuelas guardado exitosamente en: {ruta_guardado}")
-            print(f"   Total de registros: {len(df_catalogo)}")
-        
-        except Exception as e:
-            print(f"❌ Ocurrió un error al descargar o procesar el archivo: {e}")
-    else:
-        print(f"✓ El archivo '{nombre_archivo}' ya existe. Se omite.")
+    ruta_interim = PROJECT_ROOT / 'data' / 'interim' / 'formato_911'
 
+    destinos = {
+        clave: ruta_interim / clave / f'formato_911_basica_{ciclo}.csv'
+        for clave in claves_entidades
+    }
+    pendientes = {int(clave): clave for clave, ruta in destinos.items() if not ruta.exists()}
 
-# ============================================================================
-# SECCIÓN 2: DESCARGA DE DATOS DEL INEGI
-# ============================================================================
+    if not pendientes:
+        return None
 
-def cargar_configuracion():
+    # Se escribe a un archivo temporal para no dejar repartos incompletos
+    temporales = {}
+    for clave in pendientes.values():
+        destinos[clave].parent.mkdir(parents=True, exist_ok=True)
+        temporales[clave] = destinos[clave].with_suffix('.parcial')
+        temporales[clave].unlink(missing_ok=True)
+
+    return destinos, pendientes, temporales
+
+
+def repartir_bloques(lector, esquema, pendientes, temporales, validacion=None):
     """
-    Carga todas las configuraciones necesarias desde la carpeta /references.
+    Aplica el esquema a cada bloque del lector, aparta las filas que no
+    pasan la validación y agrega las demás al temporal de la entidad que
+    les corresponde.
     """
-    print("\n" + "=" * 70)
-    print("INICIANDO DESCARGA DE DATOS DEL INEGI")
-    print("=" * 70)
-    print("\n--- 1. Cargando configuración ---")
-    
-    # Cargar el .env desde la raíz del proyecto
-    dotenv_path = PROJECT_ROOT / '.env'
-    load_dotenv(dotenv_path)
-    
-    token = os.getenv("INEGI_TOKEN")
-    if not token:
-        raise ValueError("No se encontró el token de INEGI en el archivo .env")
-    
-    ruta_referencias = PROJECT_ROOT / 'references'
-    
-    # Verificar que la carpeta references existe
-    if not ruta_referencias.exists():
-        raise Exception(f"Error: La carpeta 'references' no existe en {ruta_referencias}")
-    
-    print(f"Buscando archivos de configuración en: {ruta_referencias}")
-    
-    try:
-        ruta_municipales = ruta_referencias / 'diccionario_inegi_municipio.json'
-        ruta_contexto = ruta_referencias / 'diccionario_inegi_contexto.json'
-        ruta_dict_municipios = ruta_referencias / 'diccionario_municipios_sonora.json'
-        
-        # Verificar que los archivos existen
-        archivos_requeridos = [
-            ('diccionario_inegi_municipio.json', ruta_municipales),
-            ('diccionario_inegi_contexto.json', ruta_contexto),
-            ('diccionario_municipios_sonora.json', ruta_dict_municipios)
-        ]
-        
-        archivos_faltantes = []
-        for nombre, ruta in archivos_requeridos:
-            if not ruta.exists():
-                archivos_faltantes.append(nombre)
-        
-        if archivos_faltantes:
-            raise Exception(f"Faltan los siguientes archivos en {ruta_referencias}:\n" + 
-                          "\n".join(f"  - {archivo}" for archivo in archivos_faltantes))
-        
-        with open(ruta_municipales, 'r', encoding='utf-8') as f:
-            config_municipales = json.load(f)
-        with open(ruta_contexto, 'r', encoding='utf-8') as f:
-            config_contexto = json.load(f)
-        with open(ruta_dict_municipios, 'r', encoding='utf-8') as f:
-            municipios = json.load(f)
-    
-    except FileNotFoundError as e:
-        raise Exception(f"Error: No se encontró un archivo de configuración. Detalle: {e}")
-    
-    print("✅ Configuración cargada exitosamente.")
-    return token, config_municipales, config_contexto, municipios
+    for chunk in lector:
+        chunk = aplicar_esquema(chunk, esquema)
+        mascara = chunk['entidad'].isin(list(pendientes)).fillna(False)
+        chunk = chunk[mascara]
 
+        if validacion is not None:
+            chunk = apartar_invalidas(chunk, validacion)
 
-def descargar_datos_municipales(token, config_municipales, municipios):
+        for clave_num, grupo in chunk.groupby('entidad'):
+            ruta_tmp = temporales[pendientes[int(clave_num)]]
+            grupo.to_csv(ruta_tmp, mode='a', index=False,
+                         header=not ruta_tmp.exists(), encoding='utf-8')
+
+
+def cerrar_reparto(ciclo, destinos, temporales):
     """
-    Descarga y procesa la serie histórica completa para todos 
-    los indicadores a nivel municipal.
+    Mueve los temporales completos a su nombre definitivo.
     """
-    print("\n--- 2. Descargando datos municipales (serie histórica completa) ---")
-    
-    CLAVE_SONORA = '07000026'
-    ruta_external = PROJECT_ROOT / 'data' / 'external'
-    ruta_external.mkdir(parents=True, exist_ok=True)
-    
-    for indicador in config_municipales['indicadores_municipales']:
-        nombre_indicador = indicador['nombre']
-        id_indicador = indicador['id_inegi']
-        
-        ruta_csv = ruta_external / f"{nombre_indicador}.csv"
-        
-        if ruta_csv.exists():
-            print(f"\n✓ El archivo '{nombre_indicador}.csv' ya existe. Se omite.")
-            continue
-        
-        print(f"\nProcesando indicador: {nombre_indicador}...")
-        
-        datos_de_este_indicador = []
-        for nombre_mun, codigo_mun in municipios.items():
-            ubicacion = CLAVE_SONORA + codigo_mun
-            url = f"https://www.inegi.org.mx/app/api/indicadores/desarrolladores/jsonxml/INDICATOR/{id_indicador}/es/{ubicacion}/false/BISE/2.0/{token}?type=json"
-            
-            try:
-                response = requests.get(url)
-                response.raise_for_status()
-                data = response.json()
-                observaciones = data['Series'][0]['OBSERVATIONS']
-                
-                if observaciones:
-                    for obs in observaciones:
-                        valor = obs['OBS_VALUE']
-                        periodo = obs['TIME_PERIOD']
-                        
-                        if valor is not None:
-                            datos_de_este_indicador.append({
-                                'municipio': nombre_mun,
-                                'periodo': periodo,
-                                'valor': float(valor)
-                            })
-                        else:
-                            datos_de_este_indicador.append({
-                                'municipio': nombre_mun,
-                                'periodo': periodo,
-                                'valor': np.nan
-                            })
-                else:
-                    print(f" -> Advertencia: No se encontraron observaciones para {nombre_mun}.")
-            
-            except Exception as e:
-                print(f" -> Error al consultar {nombre_mun}: {e}")
-            
-            time.sleep(0.1)
-        
-        if datos_de_este_indicador:
-            df = pd.DataFrame(datos_de_este_indicador)
-            df = df[['municipio', 'periodo', 'valor']]
-            df.to_csv(ruta_csv, index=False, encoding='utf-8')
-            print(f" -> ✅ Archivo '{nombre_indicador}.csv' guardado con {len(df)} registros.")
+    for clave, ruta_tmp in temporales.items():
+        if ruta_tmp.exists():
+            ruta_tmp.replace(destinos[clave])
+        else:
+            print(f" -> Advertencia: El ciclo {ciclo} no tiene filas para la entidad {clave}.")
 
 
-def descargar_datos_contexto(token, config_contexto):
+def avisar_faltantes(ciclo, esquema):
     """
-    Descarga y procesa todos los indicadores de contexto (estatales y nacionales).
+    Reporta las columnas del diccionario que el archivo del ciclo no trae.
     """
-    print("\n--- 3. Descargando datos de contexto (Estatales/Nacionales) ---")
-    
-    CLAVE_GEO_SONORA = '07000026'
-    CLAVE_GEO_NACIONAL = '0700'
-    ruta_external = PROJECT_ROOT / 'data' / 'external'
-    ruta_external.mkdir(parents=True, exist_ok=True)
-    
-    for indicador in config_contexto['indicadores_contexto']:
-        nombre_indicador = indicador['nombre']
-        id_indicador = indicador['id_inegi']
-        
-        ruta_csv = ruta_external / f"{nombre_indicador}.csv"
-        if ruta_csv.exists():
-            print(f"\n✓ El archivo '{nombre_indicador}.csv' ya existe. Se omite.")
+    if esquema['faltantes']:
+        print(f" -> Advertencia: El ciclo {ciclo} no trae {len(esquema['faltantes'])} "
+              f"columnas del diccionario: {', '.join(esquema['faltantes'])}")
+
+
+def repartir_formato_911(claves_entidades, tamano_chunk=TAMANO_CHUNK_911):
+    """
+    Reparte los archivos nacionales del Formato 911 en un archivo por entidad.
+    Cada archivo nacional se lee una sola vez, por bloques, y las filas de
+    todas las entidades solicitadas se escriben en la misma pasada en
+    data/interim/formato_911/<clave>/formato_911_basica_<ciclo>.csv
+
+    La lectura usa el esquema compilado del ciclo (ver esquemas_911), así que
+    los archivos por entidad ya salen con las columnas y valores canónicos.
+    """
+    print("\n--- Repartiendo el Formato 911 por entidad ---")
+
+    ruta_raw = PROJECT_ROOT / 'data' / 'raw' / 'formato_911'
+    columnas_canonicas = cargar_columnas_canonicas()
+
+    for ciclo in ARCHIVOS_FORMATO_911:
+        ruta_nacional = ruta_raw / f'formato_911_basica_{ciclo}.csv'
+        if not ruta_nacional.exists():
+            print(f"\n -> Advertencia: No existe el archivo nacional del ciclo {ciclo}. Se omite.")
             continue
-        
-        nivel_geo = indicador.get('nivel_geografico', 'estatal')
-        fuente_api = indicador.get('fuente_api', 'BISE')
-        
-        ubicacion = CLAVE_GEO_NACIONAL if nivel_geo == 'nacional' else CLAVE_GEO_SONORA
-        
-        print(f"\nProcesando indicador '{nombre_indicador}' desde {fuente_api}...")
-        
-        url = f"https://www.inegi.org.mx/app/api/indicadores/desarrolladores/jsonxml/INDICATOR/{id_indicador}/es/{ubicacion}/false/{fuente_api}/2.0/{token}?type=json"
-        
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-            observaciones = data['Series'][0]['OBSERVATIONS']
-            datos_limpios = [
-                {'periodo': obs['TIME_PERIOD'], 'valor': float(obs['OBS_VALUE'])}
-                for obs in observaciones if obs['OBS_VALUE'] is not None
-            ]
-            
-            df = pd.DataFrame(datos_limpios)
-            df.to_csv(ruta_csv, index=False, encoding='utf-8')
-            print(f" -> ✅ Archivo '{nombre_indicador}.csv' guardado.")
-        
-        except Exception as e:
-            print(f" -> ❌ Error al procesar el indicador {nombre_indicador}: {e}")
 
+        reparto = preparar_reparto(ciclo, claves_entidades)
+        if reparto is None:
+            print(f"\n✓ El ciclo {ciclo} ya está repartido para todas las entidades. Se omite.")
+            continue
+        destinos, pendientes, temporales = reparto
 
-# ============================================================================
-# FUNCIÓN PRINCIPAL
-# ============================================================================
+        print(f"\nRepartiendo ciclo {ciclo} entre {len(pendientes)} entidades...")
 
-def main():
+        esquema = compilar_esquema_archivo(ruta_nacional, ciclo, columnas_canonicas)
+        avisar_faltantes(ciclo, esquema)
+
+        validacion = iniciar_validacion(ciclo, esquema, pendientes)
+        lector = pd.read_csv(ruta_nacional, chunksize=tamano_chunk, **esquema['read_csv'])
+        repartir_bloques(lector, esquema, pendientes, temporales, validacion)
+        cerrar_reparto(ciclo, destinos, temporales)
+        resumir_validacion(validacion)
+
+        print(f" -> ✅ Ciclo {ciclo} repartido en: {PROJECT_ROOT / 'data' / 'interim' / 'formato_911'}")
+
+
+def descargar_y_repartir_ciclo(ciclo, url, claves_entidades, columnas_canonicas,
+                               tamano_chunk=TAMANO_CHUNK_911):
     """
-    Función principal que ejecuta todas las descargas.
+    Descarga un ciclo del Formato 911 y lo reparte por entidad sin guardar
+    el archivo nacional: el CSV se parsea conforme llega por la red, se
+    filtran las columnas y entidades solicitadas y solo se escribe la parte
+    filtrada y tipada.
     """
-    print("\n" + "=" * 70)
-    print("SCRIPT DE DESCARGA UNIFICADO - SEP E INEGI")
-    print("=" * 70)
-    print(f"\nDirectorio del script: {SCRIPT_DIR}")
-    print(f"Raíz del proyecto: {PROJECT_ROOT}")
-    
-    try:
-        # Parte 1: Descargas de la SEP
-        descargar_formato_911()
-        descargar_catalogo_escuelas()
-        
-        # Parte 2: Descargas del INEGI
-        api_token, conf_municipales, conf_contexto, dict_municipios = cargar_configuracion()
-        descargar_datos_municipales(api_token, conf_municipales, dict_municipios)
-        descargar_datos_contexto(api_token, conf_contexto)
-        
-        print("\n" + "=" * 70)
-        print("🎉 ¡PROCESO COMPLETO FINALIZADO EXITOSAMENTE!")
-        print("=" * 70)
-        print(f"\nArchivos guardados en:")
-        print(f"  - {PROJECT_ROOT / 'data' / 'raw' / 'formato_911'}")
-        print(f"  - {PROJECT_ROOT / 'data' / 'raw' / 'catalogo_escuelas_sonora.csv'}")
-        print(f"  - {PROJECT_ROOT / 'data' / 'external'}")
-    
-    except Exception as e:
-        print("\n" + "=" * 70)
-        print(f"❌ OCURRIÓ UN ERROR EN EL PROCESO PRINCIPAL:")
-        print(f"   {e}")
-        print("=" * 70)
+    reparto = preparar_reparto(ciclo, claves_entidades)
+    if reparto is None:
+        print(f"\n✓ El ciclo {ciclo} ya está repartido para todas las entidades. Se omite.")
+        return
+    destinos, pendientes, temporales = reparto
 
+    print(f"\nDescargando y repartiendo el ciclo {ciclo} entre {len(pendientes)} entidades...")
 
-if __name__ == "__main__":
-    main()
-"""
-Script unificado para descargar datos de SEP e INEGI
-Descarga:
-1. Formato 911 (SEP) - Matrícula escolar por ciclo escolar
-2. Catálogo de escuelas de Sonora
-3. Indicadores municipales (INEGI)
-4. Indicadores de contexto estatales y nacionales (INEGI)
-"""
+    with requests.get(url, stream=True) as response:
+        response.raise_for_status()
+        flujo = response.raw
+        flujo.decode_content = True
 
-import json
-import os
-import requests
-import pandas as pd
-import numpy as np
-import time
-from pathlib import Path
-from dotenv import load_dotenv
+        # El encabezado se lee a mano para compilar el esquema antes de parsear
+        encabezado = next(csv.reader([flujo.readline().decode('utf-8-sig')]))
+        esquema = compilar_esquema(ciclo, encabezado, columnas_canonicas)
+        avisar_faltantes(ciclo, esquema)
 
-# Obtener la ruta base del proyecto (dos niveles arriba del script)
-SCRIPT_DIR = Path(__file__).resolve().parent
-PROJECT_ROOT = SCRIPT_DIR.parent.parent
+        validacion = iniciar_validacion(ciclo, esquema, pendientes)
+        lector = pd.read_csv(flujo, header=None, names=encabezado,
+                             chunksize=tamano_chunk, **esquema['read_csv'])
+        repartir_bloques(lector, esquema, pendientes, temporales, validacion)
 
+    cerrar_reparto(ciclo, destinos, temporales)
+    resumir_validacion(validacion)
+    print(f" -> ✅ Ciclo {ciclo} descargado y repartido.")
 
-# ============================================================================
-# SECCIÓN 1: DESCARGA DE DATOS DE LA SEP
-# ============================================================================
 
-def descargar_formato_911():
+def descargar_y_repartir_formato_911(claves_entidades, hilos=len(ARCHIVOS_FORMATO_911)):
     """
-    Descarga los archivos del Formato 911 de la SEP para educación básica.
-    El Formato 911 es el principal instrumento de recolección de datos del 
-    sistema educativo en México.
+    Modo streaming: descarga los ciclos del Formato 911 en paralelo (un hilo
+    por ciclo) y reparte cada uno por entidad al vuelo, sin pasar los
+    archivos nacionales por data/raw.
     """
     print("=" * 70)
-    print("INICIANDO DESCARGA DE DATOS DE LA SEP")
+    print("INICIANDO DESCARGA DE DATOS DE LA SEP (STREAMING)")
     print("=" * 70)
-    
-    # Diccionario con los ciclos escolares y sus URLs
-    archivos_a_descargar = {
-        '2019-2020': 'https://repodatos.atdt.gob.mx/s_educacion_publica/f911/BASICA_2019-2020.csv',
-        '2020-2021': 'https://repodatos.atdt.gob.mx/s_educacion_publica/f911/BASICA_2020-2021.csv',
-        '2021-2022': 'https://repodatos.atdt.gob.mx/s_educacion_publica/f911/BASICA_2021-2022.csv',
-        '2022-2023': 'https://repodatos.atdt.gob.mx/s_educacion_publica/f911/BASICA_2022-2023.csv',
-        '2023-2024': 'https://repodatos.atdt.gob.mx/s_educacion_publica/f911/ESTANDAR_BASICA_I2324.csv'
-    }
-    
-    ruta = PROJECT_ROOT / 'data' / 'raw' / 'formato_911'
-    ruta.mkdir(parents=True, exist_ok=True)
-    
-    print("\n--- Descargando archivos del Formato 911 ---")
-    
-    for ciclo, url in archivos_a_descargar.items():
-        nombre_archivo = f'formato_911_basica_{ciclo}.csv'
-        ruta_guardado = ruta / nombre_archivo
-        
-        if not ruta_guardado.exists():
-            print(f"\nDescargando datos para el ciclo {ciclo}...")
+
+    columnas_canonicas = cargar_columnas_canonicas()
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        futuros = {
+            pool.submit(descargar_y_repartir_ciclo, ciclo, url, claves_entidades, columnas_canonicas): ciclo
+            for ciclo, url in ARCHIVOS_FORMATO_911.items()
+        }
+        for futuro in as_completed(futuros):
             try:
-                response = requests.get(url, stream=True)
-                response.raise_for_status()
-                
-                with open(ruta_guardado, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                
-                print(f" -> ✅ Archivo guardado en: {ruta_guardado}")
-            
-            except requests.exceptions.RequestException as e:
-                print(f" -> ❌ Error al descargar el archivo para el ciclo {ciclo}: {e}")
-        else:
-            print(f"\n✓ El archivo para el ciclo {ciclo} ya existe. Se omite.")
-    
+                futuro.result()
+            except Exception as e:
+                print(f" -> ❌ Error al descargar el ciclo {futuros[futuro]}: {e}")
+
     print("\n✅ Descarga del Formato 911 finalizada.")
 
 
-def descargar_catalogo_escuelas():
+def combinar_formato_911(clave_entidad=ENTIDAD_POR_DEFECTO):
     """
-    Descarga el catálogo de centros de trabajo (escuelas) del estado de Sonora.
+    Une los ciclos ya repartidos de una entidad en una sola tabla tidy
+    (data/processed/sep_datos_tidy_<slug>.csv). Todos los ciclos comparten el
+    esquema canónico, por lo que la tabla no tiene columnas medio vacías.
     """
-    print("\n--- Descargando Catálogo de Centros de Trabajo (Escuelas) de Sonora ---")
-    
-    url_catalogo = 'https://www.datos.gob.mx/dataset/2a1d047c-546b-4293-971a-c835689a37a5/resource/4f013342-5028-447f-b39d-1c08f09f47f3/download/catalogo_centro_trabajo_26_csv.csv'
+    entidad = cargar_entidades()[clave_entidad]
+    print(f"\n--- Combinando ciclos del Formato 911 de {entidad['nombre']} ---")
+
+    ruta_interim = PROJECT_ROOT / 'data' / 'interim' / 'formato_911' / clave_entidad
+    ruta_processed = PROJECT_ROOT / 'data' / 'processed'
+    ruta_processed.mkdir(parents=True, exist_ok=True)
+
+    tablas = []
+    for ciclo in ARCHIVOS_FORMATO_911:
+        ruta_ciclo = ruta_interim / f'formato_911_basica_{ciclo}.csv'
+        if ruta_ciclo.exists():
+            tablas.append(leer_ciclo_911(ruta_ciclo, ciclo))
+        else:
+            print(f" -> Advertencia: Falta el ciclo {ciclo} para {entidad['nombre']}.")
+
+    if not tablas:
+        print(f" -> ❌ No hay ciclos repartidos para {entidad['nombre']}.")
+        return None
+
+    combinado = combinar_ciclos(tablas)
+    ruta_guardado = ruta_processed / f"sep_datos_tidy_{entidad['slug']}.csv"
+    combinado.to_csv(ruta_guardado, index=False, encoding='utf-8')
+
+    print(f" -> ✅ Archivo guardado en: {ruta_guardado}")
+    print(f"   Total de filas: {len(combinado)}")
+    return combinado
+
+
+def descargar_catalogo_escuelas(clave_entidad=ENTIDAD_POR_DEFECTO, refrescar=False):
+    """
+    Descarga el catálogo de centros de trabajo (escuelas) de una entidad y
+    lo registra como instantánea. Con `refrescar` se descarga aunque ya
+    exista.
+    """
+    entidad = cargar_entidades()[clave_entidad]
+    print(f"\n--- Descargando Catálogo de Centros de Trabajo (Escuelas) de {entidad['nombre']} ---")
+
+    url_catalogo = entidad['url_catalogo']
+    if not url_catalogo:
+        print(f" -> Advertencia: No hay URL de catálogo registrada para {entidad['nombre']} "
+              f"en diccionario_entidades.json. Se omite.")
+        return
+
     ruta_raw = PROJECT_ROOT / 'data' / 'raw'
-    nombre_archivo = 'catalogo_escuelas_sonora.csv'
+    nombre_archivo = f"catalogo_escuelas_{entidad['slug']}.csv"
     ruta_guardado = ruta_raw / nombre_archivo
-    
+
     ruta_raw.mkdir(parents=True, exist_ok=True)
-    
-    if not ruta_guardado.exists():
+
+    if refrescar or not ruta_guardado.exists():
         try:
             df_catalogo = pd.read_csv(url_catalogo, encoding='latin1', low_memory=False)
             df_catalogo.to_csv(ruta_guardado, index=False, encoding='utf-8')
-            
+            guardar_instantanea(ruta_guardado)
+
             print(f"✅ Catálogo de escuelas guardado exitosamente en: {ruta_guardado}")
             print(f"   Total de registros: {len(df_catalogo)}")
-        
+
         except Exception as e:
             print(f"❌ Ocurrió un error al descargar o procesar el archivo: {e}")
     else:
@@ -423,97 +427,112 @@ def cargar_configuracion():
     print("INICIANDO DESCARGA DE DATOS DEL INEGI")
     print("=" * 70)
     print("\n--- 1. Cargando configuración ---")
-    
+
     # Cargar el .env desde la raíz del proyecto
     dotenv_path = PROJECT_ROOT / '.env'
     load_dotenv(dotenv_path)
-    
+
     token = os.getenv("INEGI_TOKEN")
     if not token:
         raise ValueError("No se encontró el token de INEGI en el archivo .env")
-    
+
     ruta_referencias = PROJECT_ROOT / 'references'
-    
+
     # Verificar que la carpeta references existe
     if not ruta_referencias.exists():
         raise Exception(f"Error: La carpeta 'references' no existe en {ruta_referencias}")
-    
+
     print(f"Buscando archivos de configuración en: {ruta_referencias}")
-    
+
     try:
         ruta_municipales = ruta_referencias / 'diccionario_inegi_municipio.json'
         ruta_contexto = ruta_referencias / 'diccionario_inegi_contexto.json'
-        ruta_dict_municipios = ruta_referencias / 'diccionario_municipios_sonora.json'
-        
+
         # Verificar que los archivos existen
         archivos_requeridos = [
             ('diccionario_inegi_municipio.json', ruta_municipales),
-            ('diccionario_inegi_contexto.json', ruta_contexto),
-            ('diccionario_municipios_sonora.json', ruta_dict_municipios)
+            ('diccionario_inegi_contexto.json', ruta_contexto)
         ]
-        
+
         archivos_faltantes = []
         for nombre, ruta in archivos_requeridos:
             if not ruta.exists():
                 archivos_faltantes.append(nombre)
-        
+
         if archivos_faltantes:
-            raise Exception(f"Faltan los siguientes archivos en {ruta_referencias}:\n" + 
+            raise Exception(f"Faltan los siguientes archivos en {ruta_referencias}:\n" +
                           "\n".join(f"  - {archivo}" for archivo in archivos_faltantes))
-        
+
         with open(ruta_municipales, 'r', encoding='utf-8') as f:
             config_municipales = json.load(f)
         with open(ruta_contexto, 'r', encoding='utf-8') as f:
             config_contexto = json.load(f)
-        with open(ruta_dict_municipios, 'r', encoding='utf-8') as f:
-            municipios = json.load(f)
-    
+
     except FileNotFoundError as e:
         raise Exception(f"Error: No se encontró un archivo de configuración. Detalle: {e}")
-    
+
     print("✅ Configuración cargada exitosamente.")
-    return token, config_municipales, config_contexto, municipios
+    return token, config_municipales, config_contexto
+
+
+def cargar_municipios(clave_entidad=ENTIDAD_POR_DEFECTO):
+    """
+    Carga el diccionario {nombre: clave} de municipios de una entidad desde
+    references/diccionario_municipios_<slug>.json. Regresa None si la
+    entidad todavía no tiene diccionario.
+    """
+    entidad = cargar_entidades()[clave_entidad]
+    ruta_dict_municipios = PROJECT_ROOT / 'references' / f"diccionario_municipios_{entidad['slug']}.json"
+
+    if not ruta_dict_municipios.exists():
+        print(f" -> Advertencia: No existe {ruta_dict_municipios.name}; "
+              f"se omiten los indicadores municipales de {entidad['nombre']}.")
+        return None
+
+    with open(ruta_dict_municipios, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
 
-def descargar_datos_municipales(token, config_municipales, municipios):
+def descargar_datos_municipales(token, config_municipales, municipios, clave_entidad=ENTIDAD_POR_DEFECTO,
+                                refrescar=False):
     """
-    Descarga y procesa la serie histórica completa para todos 
+    Descarga y procesa la serie histórica completa para todos
     los indicadores a nivel municipal.
     """
-    print("\n--- 2. Descargando datos municipales (serie histórica completa) ---")
-    
-    CLAVE_SONORA = '07000026'
-    ruta_external = PROJECT_ROOT / 'data' / 'external'
-    ruta_external.mkdir(parents=True, exist_ok=True)
-    
+    entidad = cargar_entidades()[clave_entidad]
+    print(f"\n--- 2. Descargando datos municipales de {entidad['nombre']} (serie histórica completa) ---")
+
+    clave_geo = clave_geo_entidad(clave_entidad)
+    ruta_external = ruta_external_entidad(entidad['slug'])
+
     for indicador in config_municipales['indicadores_municipales']:
         nombre_indicador = indicador['nombre']
         id_indicador = indicador['id_inegi']
-        
+
         ruta_csv = ruta_external / f"{nombre_indicador}.csv"
-        
-        if ruta_csv.exists():
+
+        if ruta_csv.exists() and not refrescar:
             print(f"\n✓ El archivo '{nombre_indicador}.csv' ya existe. Se omite.")
             continue
-        
+
         print(f"\nProcesando indicador: {nombre_indicador}...")
-        
+
         datos_de_este_indicador = []
         for nombre_mun, codigo_mun in municipios.items():
-            ubicacion = CLAVE_SONORA + codigo_mun
+            ubicacion = clave_geo + codigo_mun
             url = f"https://www.inegi.org.mx/app/api/indicadores/desarrolladores/jsonxml/INDICATOR/{id_indicador}/es/{ubicacion}/false/BISE/2.0/{token}?type=json"
-            
+
             try:
                 response = requests.get(url)
                 response.raise_for_status()
                 data = response.json()
                 observaciones = data['Series'][0]['OBSERVATIONS']
-                
+
                 if observaciones:
                     for obs in observaciones:
                         valor = obs['OBS_VALUE']
                         periodo = obs['TIME_PERIOD']
-                        
+
                         if valor is not None:
                             datos_de_este_indicador.append({
                                 'municipio': nombre_mun,
@@ -528,48 +547,58 @@ def descargar_datos_municipales(token, config_municipales, municipios):
                             })
                 else:
                     print(f" -> Advertencia: No se encontraron observaciones para {nombre_mun}.")
-            
+
             except Exception as e:
                 print(f" -> Error al consultar {nombre_mun}: {e}")
-            
+
             time.sleep(0.1)
-        
+
         if datos_de_este_indicador:
             df = pd.DataFrame(datos_de_este_indicador)
             df = df[['municipio', 'periodo', 'valor']]
             df.to_csv(ruta_csv, index=False, encoding='utf-8')
+            guardar_instantanea(ruta_csv)
             print(f" -> ✅ Archivo '{nombre_indicador}.csv' guardado con {len(df)} registros.")
 
 
-def descargar_datos_contexto(token, config_contexto):
+def descargar_datos_contexto(token, config_contexto, clave_entidad=ENTIDAD_POR_DEFECTO,
+                             niveles=('estatal', 'nacional'), refrescar=False):
     """
-    Descarga y procesa todos los indicadores de contexto (estatales y nacionales).
+    Descarga y procesa los indicadores de contexto (estatales y nacionales).
+    Los indicadores nacionales se guardan en data/external/nacional porque
+    son los mismos para todas las entidades; `niveles` permite descargarlos
+    una sola vez en corridas con varias entidades.
     """
     print("\n--- 3. Descargando datos de contexto (Estatales/Nacionales) ---")
-    
-    CLAVE_GEO_SONORA = '07000026'
-    CLAVE_GEO_NACIONAL = '0700'
-    ruta_external = PROJECT_ROOT / 'data' / 'external'
-    ruta_external.mkdir(parents=True, exist_ok=True)
-    
+
+    entidad = cargar_entidades()[clave_entidad]
+
     for indicador in config_contexto['indicadores_contexto']:
         nombre_indicador = indicador['nombre']
         id_indicador = indicador['id_inegi']
-        
+
+        nivel_geo = indicador.get('nivel_geografico', 'estatal')
+        fuente_api = indicador.get('fuente_api', 'BISE')
+
+        if nivel_geo not in niveles:
+            continue
+
+        if nivel_geo == 'nacional':
+            ubicacion = CLAVE_GEO_NACIONAL
+            ruta_external = ruta_external_entidad('nacional')
+        else:
+            ubicacion = clave_geo_entidad(clave_entidad)
+            ruta_external = ruta_external_entidad(entidad['slug'])
+
         ruta_csv = ruta_external / f"{nombre_indicador}.csv"
-        if ruta_csv.exists():
+        if ruta_csv.exists() and not refrescar:
             print(f"\n✓ El archivo '{nombre_indicador}.csv' ya existe. Se omite.")
             continue
-        
-        nivel_geo = indicador.get('nivel_geografico', 'estatal')
-        fuente_api = indicador.get('fuente_api', 'BISE')
-        
-        ubicacion = CLAVE_GEO_NACIONAL if nivel_geo == 'nacional' else CLAVE_GEO_SONORA
-        
+
         print(f"\nProcesando indicador '{nombre_indicador}' desde {fuente_api}...")
-        
+
         url = f"https://www.inegi.org.mx/app/api/indicadores/desarrolladores/jsonxml/INDICATOR/{id_indicador}/es/{ubicacion}/false/{fuente_api}/2.0/{token}?type=json"
-        
+
         try:
             response = requests.get(url)
             response.raise_for_status()
@@ -579,50 +608,176 @@ def descargar_datos_contexto(token, config_contexto):
                 {'periodo': obs['TIME_PERIOD'], 'valor': float(obs['OBS_VALUE'])}
                 for obs in observaciones if obs['OBS_VALUE'] is not None
             ]
-            
+
             df = pd.DataFrame(datos_limpios)
             df.to_csv(ruta_csv, index=False, encoding='utf-8')
+            guardar_instantanea(ruta_csv)
             print(f" -> ✅ Archivo '{nombre_indicador}.csv' guardado.")
-        
+
         except Exception as e:
             print(f" -> ❌ Error al procesar el indicador {nombre_indicador}: {e}")
 
 
+# ============================================================================
+# SECCIÓN 3: PROCESAMIENTO POR ENTIDAD
+# ============================================================================
+
+def procesar_entidad(clave_entidad, token, config_municipales, config_contexto, refrescar=False):
+    """
+    Procesa todo lo que depende de una entidad: tabla tidy del Formato 911,
+    catálogo de escuelas, indicadores municipales e indicadores de contexto
+    estatales.
+    Se ejecuta dentro de un proceso del pool. Regresa la lista de lo que
+    quedó sin generar para la entidad (vacía si está completa).
+    """
+    entidad = cargar_entidades()[clave_entidad]
+    faltantes = []
+
+    if combinar_formato_911(clave_entidad) is None:
+        faltantes.append('tabla del Formato 911')
+
+    descargar_catalogo_escuelas(clave_entidad, refrescar)
+    if not (PROJECT_ROOT / 'data' / 'raw' / f"catalogo_escuelas_{entidad['slug']}.csv").exists():
+        faltantes.append('catálogo de escuelas' if entidad['url_catalogo'] else 'catálogo de escuelas (sin URL)')
+
+    municipios = cargar_municipios(clave_entidad)
+    if municipios is not None:
+        descargar_datos_municipales(token, config_municipales, municipios, clave_entidad, refrescar)
+    else:
+        faltantes.append('indicadores municipales (sin diccionario de municipios)')
+
+    descargar_datos_contexto(token, config_contexto, clave_entidad, niveles=('estatal',), refrescar=refrescar)
+    return faltantes
+
+
+def procesar_entidades(claves_entidades, token, config_municipales, config_contexto, procesos=None,
+                       refrescar=False):
+    """
+    Procesa varias entidades en paralelo, una por proceso del pool.
+    Regresa {clave: faltantes} como procesar_entidad().
+    """
+    entidades = cargar_entidades()
+    print(f"\n--- Procesando {len(claves_entidades)} entidades en paralelo ---")
+
+    faltantes = {}
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = {
+            pool.submit(procesar_entidad, clave, token, config_municipales, config_contexto, refrescar): clave
+            for clave in claves_entidades
+        }
+        for futuro in as_completed(futuros):
+            nombre = entidades[futuros[futuro]]['nombre']
+            try:
+                faltantes[futuros[futuro]] = futuro.result()
+                print(f" -> ✅ Entidad {nombre} procesada.")
+            except Exception as e:
+                faltantes[futuros[futuro]] = [f'error: {e}']
+                print(f" -> ❌ Error al procesar la entidad {nombre}: {e}")
+
+    return faltantes
+
+
+def resumir_entidades_incompletas(faltantes):
+    """
+    Imprime qué entidades quedaron incompletas y qué les falta.
+    """
+    entidades = cargar_entidades()
+    incompletas = {clave: partes for clave, partes in sorted(faltantes.items()) if partes}
+    if not incompletas:
+        print(f"\n✅ Todas las entidades procesadas quedaron completas ({len(faltantes)}).")
+        return
+
+    print(f"\n -> Advertencia: {len(incompletas)} de {len(faltantes)} entidades quedaron incompletas:")
+    for clave, partes in incompletas.items():
+        print(f"   {clave} {entidades[clave]['nombre']}: falta {', '.join(partes)}")
+
+
 # ============================================================================
 # FUNCIÓN PRINCIPAL
 # ============================================================================
 
+def leer_argumentos():
+    """
+    Lee las entidades a procesar desde la línea de comandos.
+    """
+    parser = argparse.ArgumentParser(description="Descarga unificada de datos de SEP e INEGI.")
+    parser.add_argument('--entidades', nargs='+', default=[ENTIDAD_POR_DEFECTO],
+                        help="Claves de entidad a procesar (p. ej. 26 02 25).")
+    parser.add_argument('--todas', action='store_true',
+                        help="Procesa las 32 entidades federativas.")
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="Número de procesos del pool (por omisión, uno por CPU).")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Descarga el Formato 911 y lo filtra al vuelo, sin guardar los archivos nacionales.")
+    parser.add_argument('--refrescar', action='store_true',
+                        help="Vuelve a descargar catálogos e indicadores del INEGI y guarda una instantánea nueva.")
+    # El Makefile pasa las rutas data/raw y data/processed; las rutas del proyecto son fijas
+    parser.add_argument('rutas', nargs='*',
+                        help="Rutas de datos crudos y procesados (se aceptan por compatibilidad con el Makefile).")
+    argumentos = parser.parse_args()
+
+    entidades = cargar_entidades()
+    if argumentos.todas:
+        argumentos.entidades = list(entidades)
+    else:
+        argumentos.entidades = [clave.zfill(2) for clave in argumentos.entidades]
+        desconocidas = [clave for clave in argumentos.entidades if clave not in entidades]
+        if desconocidas:
+            parser.error(f"Claves de entidad desconocidas: {', '.join(desconocidas)}")
+
+    return argumentos
+
+
 def main():
     """
     Función principal que ejecuta todas las descargas.
     """
+    argumentos = leer_argumentos()
+
     print("\n" + "=" * 70)
     print("SCRIPT DE DESCARGA UNIFICADO - SEP E INEGI")
     print("=" * 70)
     print(f"\nDirectorio del script: {SCRIPT_DIR}")
     print(f"Raíz del proyecto: {PROJECT_ROOT}")
-    
+    print(f"Entidades: {', '.join(argumentos.entidades)}")
+
     try:
-        # Parte 1: Descargas de la SEP
-        descargar_formato_911()
-        descargar_catalogo_escuelas()
-        
-        # Parte 2: Descargas del INEGI
-        api_token, conf_municipales, conf_contexto, dict_municipios = cargar_configuracion()
-        descargar_datos_municipales(api_token, conf_municipales, dict_municipios)
-        descargar_datos_contexto(api_token, conf_contexto)
-        
+        # Parte 1: Formato 911 nacional, leído una sola vez y repartido por entidad
+        if argumentos.streaming:
+            descargar_y_repartir_formato_911(argumentos.entidades)
+        else:
+            descargar_formato_911()
+            repartir_formato_911(argumentos.entidades)
+
+        # Parte 2: Descargas del INEGI que no dependen de la entidad
+        api_token, conf_municipales, conf_contexto = cargar_configuracion()
+        descargar_datos_contexto(api_token, conf_contexto, niveles=('nacional',), refrescar=argumentos.refrescar)
+
+        # Parte 3: Catálogo e indicadores por entidad
+        if len(argumentos.entidades) == 1:
+            clave = argumentos.entidades[0]
+            faltantes = {clave: procesar_entidad(clave, api_token, conf_municipales, conf_contexto,
+                                                 argumentos.refrescar)}
+        else:
+            faltantes = procesar_entidades(argumentos.entidades, api_token, conf_municipales,
+                                           conf_contexto, procesos=argumentos.procesos,
+                                           refrescar=argumentos.refrescar)
+        resumir_entidades_incompletas(faltantes)
+
         print("\n" + "=" * 70)
         print("🎉 ¡PROCESO COMPLETO FINALIZADO EXITOSAMENTE!")
         print("=" * 70)
         print(f"\nArchivos guardados en:")
         print(f"  - {PROJECT_ROOT / 'data' / 'raw' / 'formato_911'}")
-        print(f"  - {PROJECT_ROOT / 'data' / 'raw' / 'catalogo_escuelas_sonora.csv'}")
+        print(f"  - {PROJECT_ROOT / 'data' / 'interim' / 'formato_911'}")
+        print(f"  - {PROJECT_ROOT / 'data' / 'processed'} (sep_datos_tidy_<entidad>.csv)")
+        print(f"  - {PROJECT_ROOT / 'data' / 'raw'} (catalogo_escuelas_<entidad>.csv)")
         print(f"  - {PROJECT_ROOT / 'data' / 'external'}")
-    
+        print(f"  - {PROJECT_ROOT / 'data' / 'raw' / 'instantaneas'} (historial de descargas)")
+
     except Exception as e:
         print("\n" + "=" * 70)
-        print(f" OCURRIÓ UN ERROR EN EL PROCESO PRINCIPAL:")
+        print(f"❌ OCURRIÓ UN ERROR EN EL PROCESO PRINCIPAL:")
         print(f"   {e}")
         print("=" * 70)
 
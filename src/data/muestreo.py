@@ -0,0 +1,189 @@
+"""
+Genera las muestras pequeñas (muestra_*.csv) a partir de los datos completos.
+
+Las muestras se usan para desarrollar los notebooks sin cargar los archivos
+nacionales. En lugar de recortarlas a mano, se recorren los datos completos
+una sola vez, por bloques, y se hace un muestreo de reservorio por estrato:
+a cada fila se le asigna una llave aleatoria y de cada estrato se conservan
+solo las `tamano` filas con las llaves más pequeñas, así que la memoria
+queda acotada por tamano x número de estratos más un bloque, sin importar
+el tamaño de los datos. Al final se reparten los `tamano` lugares por
+turnos entre los estratos: los que no llenan su cuota ceden sus lugares a
+los demás, de modo que la muestra tiene exactamente `tamano` filas (o
+todas, si los datos son menos).
+Con la misma semilla y los mismos datos se obtiene siempre la misma muestra.
+
+Fuentes disponibles:
+  - sep:      archivos nacionales del Formato 911 (data/raw/formato_911),
+              estratos entidad x ciclo x nivel x control
+              -> notebooks/muestra_sep_datos_tidy.csv
+  - inegi:    tabla tidy del INEGI de Sonora (data/processed/sonora_educacion_tidy_inegi.csv),
+              estratos fuente x nivel -> muestra_inegi.csv
+  - catalogo: catálogos de escuelas (data/raw/catalogo_escuelas_*.csv),
+              estratos entidad x nivel x control
+              -> notebooks/muestra_catalogo_escuelas.csv
+
+Uso:
+    python -m src.data.muestreo sep --tamano 1000 --semilla 42
+    python -m src.data.muestreo inegi catalogo
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from src.data.esquemas_911 import leer_ciclo_911
+from src.data.make_dataset import (
+    ARCHIVOS_FORMATO_911,
+    ENTIDAD_POR_DEFECTO,
+    TAMANO_CHUNK_911,
+    cargar_entidades,
+    ruta_inegi_tidy,
+)
+
+# Obtener la ruta base del proyecto (dos niveles arriba del script)
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent.parent
+
+SEMILLA = 42
+TAMANO_MUESTRA = 1000
+
+ESTRATOS = {
+    'sep': ['entidad', 'periodo_escolar', 'nivel', 'control'],
+    'inegi': ['fuente', 'nivel'],
+    'catalogo': ['inmueble_cv_ent', 'tiponivelsub_c_servicion2', 'sostenimiento_c_control'],
+}
+
+SALIDAS = {
+    'sep': PROJECT_ROOT / 'notebooks' / 'muestra_sep_datos_tidy.csv',
+    'inegi': PROJECT_ROOT / 'muestra_inegi.csv',
+    'catalogo': PROJECT_ROOT / 'notebooks' / 'muestra_catalogo_escuelas.csv',
+}
+
+
+def muestrear_por_estratos(bloques, estratos, tamano=TAMANO_MUESTRA, semilla=SEMILLA):
+    """
+    Muestreo de reservorio estratificado sobre un iterador de DataFrames.
+
+    Cada fila recibe una llave uniforme; un estrato conserva sus `tamano`
+    llaves más pequeñas, lo que equivale a una muestra aleatoria simple del
+    estrato. Al terminar se toma la fila de menor llave de cada estrato,
+    luego la segunda, etc., hasta juntar `tamano` filas. Regresa
+    min(tamano, filas de los datos) filas en su orden original.
+    """
+    rng = np.random.default_rng(semilla)
+    reservorio = None
+    llaves = None
+    desplazamiento = 0
+
+    for bloque in bloques:
+        # El índice global de fila sirve para devolver la muestra en orden
+        bloque = bloque.set_axis(pd.RangeIndex(desplazamiento, desplazamiento + len(bloque)))
+        llaves_bloque = pd.Series(rng.random(len(bloque)), index=bloque.index)
+        desplazamiento += len(bloque)
+
+        if reservorio is None:
+            reservorio, llaves = bloque, llaves_bloque
+        else:
+            reservorio = pd.concat([reservorio, bloque])
+            llaves = pd.concat([llaves, llaves_bloque])
+
+        orden = llaves.sort_values(kind='stable').index
+        rango = reservorio.loc[orden, estratos].groupby(estratos, dropna=False, observed=True, sort=False).cumcount()
+
+        # Ningún estrato puede aportar más de `tamano` filas a la muestra
+        conservar = rango.index[rango.to_numpy() < tamano]
+        reservorio, llaves = reservorio.loc[conservar], llaves.loc[conservar]
+
+    if reservorio is None:
+        return pd.DataFrame()
+
+    # Reparto por turnos: primero la mejor fila de cada estrato, luego la segunda...
+    rango = reservorio[estratos].groupby(estratos, dropna=False, observed=True, sort=False).cumcount()
+    prioridad = pd.DataFrame({'rango': rango, 'llave': llaves})
+    elegidas = prioridad.sort_values(['rango', 'llave']).index[:tamano]
+
+    return reservorio.loc[elegidas.sort_values()].reset_index(drop=True)
+
+
+def bloques_sep(tamano_chunk=TAMANO_CHUNK_911):
+    """
+    Recorre los archivos nacionales del Formato 911 ya armonizados.
+    """
+    ruta_raw = PROJECT_ROOT / 'data' / 'raw' / 'formato_911'
+    for ciclo in ARCHIVOS_FORMATO_911:
+        ruta_ciclo = ruta_raw / f'formato_911_basica_{ciclo}.csv'
+        if not ruta_ciclo.exists():
+            print(f" -> Advertencia: No existe el archivo del ciclo {ciclo}. Se omite.")
+            continue
+        print(f"Leyendo ciclo {ciclo}...")
+        yield from leer_ciclo_911(ruta_ciclo, ciclo, tamano_chunk)
+
+
+def bloques_inegi(tamano_chunk=TAMANO_CHUNK_911):
+    """
+    Recorre la tabla tidy del INEGI.
+    """
+    ruta_inegi = ruta_inegi_tidy(cargar_entidades()[ENTIDAD_POR_DEFECTO]['slug'])
+    if not ruta_inegi.exists():
+        raise Exception(f"Error: No existe {ruta_inegi}. Ejecuta primero 1_transformacion_datos_inegi")
+    yield from pd.read_csv(ruta_inegi, chunksize=tamano_chunk, dtype={'periodo': str})
+
+
+def bloques_catalogo(tamano_chunk=TAMANO_CHUNK_911):
+    """
+    Recorre los catálogos de escuelas de todas las entidades descargadas.
+    """
+    rutas = sorted((PROJECT_ROOT / 'data' / 'raw').glob('catalogo_escuelas_*.csv'))
+    if not rutas:
+        raise Exception("Error: No hay catálogos en data/raw. Ejecuta primero python -m src.data.make_dataset")
+    for ruta in rutas:
+        print(f"Leyendo {ruta.name}...")
+        yield from pd.read_csv(ruta, chunksize=tamano_chunk, low_memory=False)
+
+
+BLOQUES = {
+    'sep': bloques_sep,
+    'inegi': bloques_inegi,
+    'catalogo': bloques_catalogo,
+}
+
+
+def generar_muestra(fuente, tamano=TAMANO_MUESTRA, semilla=SEMILLA, ruta_salida=None):
+    """
+    Genera y guarda la muestra estratificada de una fuente.
+    """
+    print(f"\n--- Generando muestra de '{fuente}' ({tamano} filas, semilla {semilla}) ---")
+
+    muestra = muestrear_por_estratos(BLOQUES[fuente](), ESTRATOS[fuente], tamano, semilla)
+
+    ruta_salida = Path(ruta_salida) if ruta_salida else SALIDAS[fuente]
+    ruta_salida.parent.mkdir(parents=True, exist_ok=True)
+    muestra.to_csv(ruta_salida, index=False, encoding='utf-8')
+
+    n_estratos = muestra.groupby(ESTRATOS[fuente], dropna=False, observed=True).ngroups
+    print(f" -> ✅ Muestra guardada en: {ruta_salida}")
+    print(f"   Filas: {len(muestra)} | Estratos: {n_estratos}")
+    return muestra
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera muestras estratificadas de los datos completos.")
+    parser.add_argument('fuentes', nargs='+', choices=list(BLOQUES),
+                        help="Fuentes a muestrear.")
+    parser.add_argument('--tamano', type=int, default=TAMANO_MUESTRA,
+                        help="Número de filas de cada muestra.")
+    parser.add_argument('--semilla', type=int, default=SEMILLA,
+                        help="Semilla del generador aleatorio.")
+    argumentos = parser.parse_args()
+
+    for fuente in argumentos.fuentes:
+        try:
+            generar_muestra(fuente, argumentos.tamano, argumentos.semilla)
+        except Exception as e:
+            print(f"❌ Ocurrió un error al generar la muestra de '{fuente}': {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Validación de calidad de datos del Formato 911 mientras se reparte.
+
+Las reglas son declarativas (ver REGLAS) y se evalúan como expresiones
+vectorizadas sobre cada bloque que sale de aplicar_esquema(), así que la
+validación no requiere una segunda pasada sobre los archivos nacionales.
+Las filas que fallan alguna regla no llegan a los archivos por entidad: se
+apartan en data/interim/formato_911/<clave>/cuarentena_<ciclo>.csv, junto
+al archivo de la entidad, con la columna 'motivos' (códigos de regla
+separados por '|'). Cada reparto solo reinicia la cuarentena de las
+entidades que está generando, así que las de otras entidades se conservan.
+
+Hay dos tipos de regla:
+- 'expresion': una expresión de DataFrame.eval() que es verdadera en las
+  filas con error ('insc_t != hom_t + muj_t'). 'VALOR_NEGATIVO' se arma con
+  todas las columnas numéricas del esquema.
+- 'atipico': una métrica ('insc_t / tot_doc') cuyo valor se compara con la
+  mediana y la MAD de su grupo (nivel x control) en escala log1p; 'cola'
+  indica si se marcan los valores altos, los bajos o ambos. Las
+  estadísticas se acumulan bloque a bloque en histogramas por grupo, de
+  modo que la memoria no depende del tamaño de los datos. Cada bloque se
+  evalúa con lo acumulado hasta ese bloque (inclusive), y un grupo no marca
+  atípicos hasta tener MIN_OBSERVACIONES filas.
+"""
+
+import re
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Obtener la ruta base del proyecto (dos niveles arriba del script)
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent.parent
+
+REGLAS = [
+    {
+        'codigo': 'INSCRITOS_NO_SUMAN',
+        'tipo': 'expresion',
+        'expresion': 'insc_t != hom_t + muj_t',
+        'descripcion': 'La matrícula total no es hombres + mujeres.',
+    },
+    {
+        'codigo': 'DOCENTES_NO_SUMAN',
+        'tipo': 'expresion',
+        'expresion': 'tot_doc != docente_h + docente_m',
+        'descripcion': 'El total de docentes no es hombres + mujeres.',
+    },
+    {
+        'codigo': 'VALOR_NEGATIVO',
+        'tipo': 'expresion',
+        'expresion': None,
+        'descripcion': 'Algún conteo o clave numérica es negativo.',
+    },
+    {
+        'codigo': 'ALUMNOS_POR_DOCENTE_ATIPICO',
+        'tipo': 'atipico',
+        'metrica': 'insc_t / tot_doc',
+        'grupos': ['nivel', 'control'],
+        'umbral': 3.5,
+        'cola': 'superior',
+        'descripcion': 'Alumnos por docente muy alejado de la mediana de su nivel y control.',
+    },
+]
+
+# Histogramas de la escala log1p: de 0 a log1p(VALOR_MAXIMO) en N_CLASES clases
+N_CLASES = 512
+VALOR_MAXIMO = 10_000
+MIN_OBSERVACIONES = 50
+
+
+def ruta_cuarentena(ciclo, clave_entidad):
+    """
+    Archivo de cuarentena de una entidad en un ciclo.
+    """
+    return PROJECT_ROOT / 'data' / 'interim' / 'formato_911' / clave_entidad / f'cuarentena_{ciclo}.csv'
+
+
+def compilar_reglas(esquema, reglas=REGLAS):
+    """
+    Resuelve las reglas contra el esquema del ciclo: arma la expresión de
+    VALOR_NEGATIVO con sus columnas numéricas y descarta las reglas que
+    usan columnas que el esquema no tiene.
+    """
+    numericas = [columna for columna, tipo in esquema['tipos'].items() if tipo == 'Int32']
+    compiladas = []
+
+    for regla in reglas:
+        regla = dict(regla)
+        if regla['codigo'] == 'VALOR_NEGATIVO':
+            regla['expresion'] = ' | '.join(f'({columna} < 0)' for columna in numericas)
+
+        texto = regla['expresion'] if regla['tipo'] == 'expresion' else regla['metrica']
+        columnas = re.findall(r'[A-Za-z_]\w*', texto or '') + regla.get('grupos', [])
+        if not texto or any(columna not in esquema['columnas'] for columna in columnas):
+            print(f" -> Advertencia: Se omite la regla {regla['codigo']}; faltan columnas en el esquema.")
+            continue
+        compiladas.append(regla)
+
+    return compiladas
+
+
+def iniciar_validacion(ciclo, esquema, pendientes, reglas=REGLAS):
+    """
+    Estado de la validación de un ciclo: reglas compiladas, histogramas por
+    grupo de cada regla de atípicos, conteo de filas por motivo y archivo
+    de cuarentena de cada entidad pendiente ({entidad numérica: clave},
+    como en make_dataset.preparar_reparto). Solo se borran las cuarentenas
+    anteriores de esas entidades.
+    """
+    rutas = {}
+    for clave_num, clave in pendientes.items():
+        rutas[clave_num] = ruta_cuarentena(ciclo, clave)
+        rutas[clave_num].parent.mkdir(parents=True, exist_ok=True)
+        rutas[clave_num].unlink(missing_ok=True)
+
+    return {
+        'ciclo': ciclo,
+        'reglas': compilar_reglas(esquema, reglas),
+        'histogramas': {},
+        'motivos': {},
+        'filas': 0,
+        'rutas': rutas,
+    }
+
+
+# ============================================================================
+# SECCIÓN 1: ESTADÍSTICAS ROBUSTAS INCREMENTALES
+# ============================================================================
+
+def evaluar_metrica(chunk, regla):
+    """
+    Valor de la métrica de una regla de atípicos en escala log1p (NaN si
+    no se puede calcular, p. ej. sin docentes).
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        valores = chunk.eval(regla['metrica']).to_numpy(dtype='float64', na_value=np.nan, copy=True)
+    valores[~np.isfinite(valores) | (valores < 0)] = np.nan
+    return np.log1p(valores)
+
+
+def clases_histograma(valores):
+    """
+    Clase del histograma de cada valor (ya en escala log1p).
+    """
+    ancho = np.log1p(VALOR_MAXIMO) / N_CLASES
+    return np.clip((valores / ancho).astype(np.int64), 0, N_CLASES - 1)
+
+
+def clave_grupo(chunk, columnas):
+    """
+    Clave de texto del grupo de cada fila ('PRIMARIA|PÚBLICO'), armada con
+    str.cat en lugar de unir fila por fila.
+    """
+    clave = chunk[columnas[0]].astype('string').fillna('')
+    for columna in columnas[1:]:
+        clave = clave.str.cat(chunk[columna].astype('string').fillna(''), sep='|')
+    return clave
+
+
+def acumular_histogramas(chunk, regla, histogramas):
+    """
+    Suma los valores del bloque al histograma de su grupo.
+    """
+    valores = evaluar_metrica(chunk, regla)
+    validos = ~np.isnan(valores)
+    grupos = clave_grupo(chunk[validos], regla['grupos'])
+    clases = clases_histograma(valores[validos])
+
+    for grupo, posiciones in pd.Series(np.arange(len(grupos))).groupby(grupos.to_numpy()).indices.items():
+        conteo = np.bincount(clases[posiciones], minlength=N_CLASES)
+        histogramas[grupo] = histogramas.get(grupo, 0) + conteo
+
+    return valores, grupos.reindex(chunk.index)
+
+
+def mediana_histograma(conteos, centros):
+    """
+    Mediana ponderada de `centros` con pesos `conteos`.
+    """
+    acumulado = np.cumsum(conteos)
+    return centros[np.searchsorted(acumulado, acumulado[-1] / 2)]
+
+
+def mediana_y_mad(histograma):
+    """
+    Mediana y desviación absoluta mediana (MAD) a partir de un histograma.
+    """
+    ancho = np.log1p(VALOR_MAXIMO) / N_CLASES
+    centros = (np.arange(N_CLASES) + 0.5) * ancho
+
+    mediana = mediana_histograma(histograma, centros)
+    desviaciones = np.abs(centros - mediana)
+    orden = np.argsort(desviaciones, kind='stable')
+    mad = mediana_histograma(histograma[orden], desviaciones[orden])
+
+    # La MAD nunca baja de media clase para no dividir entre cero
+    return mediana, max(mad, ancho / 2)
+
+
+def marcar_atipicos(chunk, regla, histogramas):
+    """
+    Actualiza los histogramas con el bloque y marca las filas cuyo z
+    robusto (0.6745 * (x - mediana) / MAD) supera el umbral en la cola de
+    la regla.
+    """
+    valores, grupos = acumular_histogramas(chunk, regla, histogramas)
+
+    medianas = {}
+    mads = {}
+    for grupo, histograma in histogramas.items():
+        if histograma.sum() >= MIN_OBSERVACIONES:
+            medianas[grupo], mads[grupo] = mediana_y_mad(histograma)
+
+    mediana = grupos.map(medianas).astype('float64').to_numpy(na_value=np.nan)
+    mad = grupos.map(mads).astype('float64').to_numpy(na_value=np.nan)
+
+    with np.errstate(invalid='ignore'):
+        z = 0.6745 * (valores - mediana) / mad
+
+    cola = regla.get('cola', 'ambas')
+    if cola == 'superior':
+        falla = z > regla['umbral']
+    elif cola == 'inferior':
+        falla = z < -regla['umbral']
+    else:
+        falla = np.abs(z) > regla['umbral']
+    return pd.Series(falla, index=chunk.index)
+
+
+# ============================================================================
+# SECCIÓN 2: EVALUACIÓN POR BLOQUE
+# ============================================================================
+
+def evaluar_reglas(chunk, validacion):
+    """
+    Evalúa todas las reglas sobre un bloque. Regresa un DataFrame booleano
+    (filas x códigos de regla), verdadero donde la fila falla.
+    """
+    fallas = {}
+    for regla in validacion['reglas']:
+        if regla['tipo'] == 'expresion':
+            falla = chunk.eval(regla['expresion'])
+        else:
+            falla = marcar_atipicos(chunk, regla, validacion['histogramas'])
+        fallas[regla['codigo']] = pd.Series(falla, index=chunk.index).astype('boolean').fillna(False)
+
+    return pd.DataFrame(fallas, index=chunk.index, dtype=bool)
+
+
+def apartar_invalidas(chunk, validacion):
+    """
+    Evalúa las reglas, agrega las filas que fallan al archivo de cuarentena
+    de su entidad con sus motivos y regresa solo las filas válidas.
+    """
+    if chunk.empty or not validacion['reglas']:
+        return chunk
+
+    fallas = evaluar_reglas(chunk, validacion)
+    invalidas = fallas.any(axis=1).to_numpy()
+    validacion['filas'] += len(chunk)
+
+    if invalidas.any():
+        codigos = fallas.columns.to_numpy()
+        motivos = ['|'.join(codigos[fila]) for fila in fallas.to_numpy()[invalidas]]
+
+        cuarentena = chunk[invalidas].assign(motivos=motivos)
+        for clave_num, grupo in cuarentena.groupby('entidad'):
+            ruta = validacion['rutas'][int(clave_num)]
+            grupo.to_csv(ruta, mode='a', index=False, header=not ruta.exists(), encoding='utf-8')
+
+        for codigo, conteo in fallas[invalidas].sum().items():
+            validacion['motivos'][codigo] = validacion['motivos'].get(codigo, 0) + int(conteo)
+
+    return chunk[~invalidas]
+
+
+def resumir_validacion(validacion):
+    """
+    Imprime cuántas filas se apartaron por cada motivo.
+    """
+    ciclo = validacion['ciclo']
+    apartadas = {codigo: conteo for codigo, conteo in validacion['motivos'].items() if conteo}
+    if not apartadas:
+        print(f" -> ✅ Ciclo {ciclo}: {validacion['filas']} filas validadas sin errores.")
+        return
+
+    ruta = ruta_cuarentena(ciclo, '<clave>')
+    print(f" -> Advertencia: Ciclo {ciclo}: filas en cuarentena ({ruta}):")
+    for codigo, conteo in sorted(apartadas.items(), key=lambda par: -par[1]):
+        print(f"   {codigo}: {conteo} de {validacion['filas']}")
@@ -0,0 +1,252 @@
+"""
+Alineación temporal entre ciclos escolares de la SEP y series del INEGI.
+
+Los periodos del INEGI mezclan años ('2000'), meses o trimestres ('1994/01')
+y años censales, mientras que la SEP reporta ciclos ('2019-2020'). Unir por
+un 'anio' exacto deja sin contexto a casi todas las filas de la SEP porque
+los censos y conteos no caen en los años de los ciclos.
+
+Este módulo:
+1. Convierte todos los formatos de periodo a un tiempo decimal (años) con
+   operaciones vectorizadas de texto.
+2. Para cada (municipio, indicador) interpola linealmente entre las dos
+   observaciones que rodean la fecha de cada ciclo, usando dos merge_asof
+   (hacia atrás y hacia adelante) en lugar de ciclos de Python.
+   Los indicadores estatales y nacionales (sin municipio) se interpolan una
+   sola vez por fecha y se reparten a todos los municipios.
+3. Rellena lo que quede con el promedio del municipio y luego con el de la
+   entidad, con transform('mean') en lugar de lambdas.
+4. Pega el contexto a la tabla de la SEP con un solo merge.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.data.esquemas_911 import ESQUEMAS_CICLO, periodo_canonico
+
+# Mes de referencia del Formato 911: la estadística de inicio de cursos se
+# levanta en septiembre-octubre, así que el ciclo 2019-2020 se ubica en 2019.75
+MES_REFERENCIA_CICLO = 10
+
+# Clave con la que se agrupan los indicadores sin municipio (estatales/nacionales)
+CLAVE_GENERAL = '__GENERAL__'
+
+# Número de subperiodos por año según la frecuencia
+SUBPERIODOS_POR_ANIO = {'anual': 1, 'trimestral': 4, 'mensual': 12}
+
+
+def normalizar_nombre(serie):
+    """
+    Normaliza nombres de municipio para poder unir SEP e INEGI:
+    mayúsculas, sin acentos y sin espacios sobrantes
+    ('Benjamin Hill', 'BENJAMÍN HILL ' -> 'BENJAMIN HILL').
+    """
+    return (
+        serie.astype('string')
+        .str.strip()
+        .str.upper()
+        .str.normalize('NFKD')
+        .str.encode('ascii', errors='ignore')
+        .str.decode('ascii')
+        .str.replace(r'\s+', ' ', regex=True)
+    )
+
+
+def parsear_periodos_inegi(periodo, frecuencia='auto', grupos=None):
+    """
+    Convierte la columna 'periodo' del INEGI a un DataFrame tipado con:
+      - anio:        año (Int16)
+      - subperiodo:  mes o trimestre (Int8; nulo en series anuales)
+      - frecuencia:  'anual', 'trimestral' o 'mensual'
+      - fecha:       inicio del periodo (datetime64)
+      - tiempo:      punto medio del periodo en años decimales (float64)
+
+    Con frecuencia='auto' los periodos 'AAAA/NN' se toman como trimestrales
+    si el subperiodo máximo de su grupo (p. ej. su 'fuente') es 4 o menos,
+    y como mensuales en otro caso.
+    """
+    partes = periodo.astype('string').str.strip().str.extract(r'^(\d{4})(?:/(\d{1,2}))?$')
+    anio = pd.to_numeric(partes[0], errors='coerce').astype('float64')
+    subperiodo = pd.to_numeric(partes[1], errors='coerce').astype('float64')
+
+    if frecuencia == 'auto':
+        if grupos is None:
+            maximo = pd.Series(subperiodo.max(), index=subperiodo.index)
+        else:
+            maximo = subperiodo.groupby(grupos).transform('max')
+        n = np.where(subperiodo.isna(), 1, np.where(maximo <= 4, 4, 12))
+    else:
+        n = np.full(len(periodo), SUBPERIODOS_POR_ANIO[frecuencia])
+
+    sub = subperiodo.fillna(1).to_numpy()
+    tiempo = anio.to_numpy() + (sub - 0.5) / n
+    mes_inicio = ((sub - 1) * (12 // n) + 1).astype('int64')
+
+    fecha = pd.to_datetime(
+        pd.DataFrame({'year': anio, 'month': mes_inicio, 'day': 1}),
+        errors='coerce'
+    )
+
+    return pd.DataFrame({
+        'anio': anio.astype('Int16'),
+        'subperiodo': subperiodo.astype('Int8'),
+        'frecuencia': pd.Categorical.from_codes(
+            np.select([n == 1, n == 4], [0, 1], 2),
+            categories=['anual', 'trimestral', 'mensual']
+        ),
+        'fecha': fecha,
+        'tiempo': tiempo,
+    }, index=periodo.index)
+
+
+def parsear_ciclos_escolares(ciclo):
+    """
+    Convierte 'periodo_escolar' de la SEP ('2019-2020') o la clave 'periodo'
+    al tiempo decimal del levantamiento de inicio de cursos.
+
+    Las claves de 'periodo' no siguen un solo formato ('I2019' es el ciclo
+    2019-2020 pero 'I2122' es 2021-2022), así que su año de inicio se toma
+    del registro ESQUEMAS_CICLO, tanto de la clave original de cada archivo
+    como de la canónica. Una clave que no está registrada queda nula.
+    """
+    inicio_por_clave = {}
+    for nombre_ciclo, declaracion in ESQUEMAS_CICLO.items():
+        anio = float(nombre_ciclo.split('-')[0])
+        inicio_por_clave[declaracion['periodo']] = anio
+        inicio_por_clave[periodo_canonico(nombre_ciclo)] = anio
+
+    texto = ciclo.astype('string').str.strip().str.upper()
+    anio_largo = pd.to_numeric(texto.str.extract(r'^(\d{4})-\d{4}$')[0], errors='coerce').astype('float64')
+    anio_clave = texto.map(inicio_por_clave).astype('float64')
+    anio_inicio = anio_largo.fillna(anio_clave)
+    return anio_inicio + (MES_REFERENCIA_CICLO - 0.5) / 12
+
+
+def a_formato_largo(inegi_ancho, por='municipio', columna_periodo='periodo'):
+    """
+    Pasa una tabla ancha del INEGI (una columna por indicador, como
+    inegi_contexto_municipal.csv) al formato largo municipio/periodo/fuente/valor.
+    """
+    return inegi_ancho.melt(
+        id_vars=[por, columna_periodo], var_name='fuente', value_name='valor'
+    )
+
+
+def interpolar_intercensal(observaciones, objetivos, por='municipio', extrapolar=True):
+    """
+    Interpola cada (por, fuente) en los tiempos de `objetivos`.
+
+    `observaciones` es largo con columnas [por, 'fuente', 'tiempo', 'valor'];
+    `objetivos` tiene columnas [por, 'tiempo']. Para cada objetivo se busca
+    la observación anterior y la siguiente con merge_asof y se interpola
+    linealmente entre ambas. Fuera del rango observado se usa la observación
+    más cercana si `extrapolar` es True, o se deja nulo.
+    """
+    obs = observaciones.dropna(subset=['tiempo', 'valor'])
+    obs = obs[[por, 'fuente', 'tiempo', 'valor']].sort_values('tiempo')
+
+    # Un objetivo por cada fuente disponible en el municipio
+    fuentes = obs[[por, 'fuente']].drop_duplicates()
+    obj = objetivos[[por, 'tiempo']].drop_duplicates().merge(fuentes, on=por)
+    obj = obj.sort_values('tiempo')
+
+    anterior = pd.merge_asof(
+        obj, obs.rename(columns={'tiempo': 't0', 'valor': 'v0'}),
+        left_on='tiempo', right_on='t0', by=[por, 'fuente'], direction='backward'
+    )
+    siguiente = pd.merge_asof(
+        obj, obs.rename(columns={'tiempo': 't1', 'valor': 'v1'}),
+        left_on='tiempo', right_on='t1', by=[por, 'fuente'], direction='forward'
+    )
+    anterior[['t1', 'v1']] = siguiente[['t1', 'v1']].to_numpy()
+
+    t0, v0 = anterior['t0'].to_numpy(float), anterior['v0'].to_numpy(float)
+    t1, v1 = anterior['t1'].to_numpy(float), anterior['v1'].to_numpy(float)
+    t = anterior['tiempo'].to_numpy(float)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        peso = np.where(t1 > t0, (t - t0) / (t1 - t0), 0.0)
+    valor = v0 + (v1 - v0) * peso
+
+    if extrapolar:
+        valor = np.where(np.isnan(v0), v1, np.where(np.isnan(v1), v0, valor))
+
+    anterior['valor'] = valor
+    return anterior[[por, 'fuente', 'tiempo', 'valor']]
+
+
+def interpolar_contexto(inegi, objetivos, extrapolar=True):
+    """
+    Contexto del INEGI en formato ancho para cada (_clave, tiempo) de
+    `objetivos`: una columna por indicador.
+
+    `inegi` es largo con columnas ['_clave', 'fuente', 'tiempo', 'valor'];
+    las filas con '_clave' nula son indicadores estatales o nacionales, que
+    se interpolan una sola vez por fecha y se reparten a todos los
+    municipios de `objetivos`.
+    """
+    municipal = inegi[inegi['_clave'].notna()]
+    general = inegi[inegi['_clave'].isna()]
+
+    partes = [interpolar_intercensal(municipal, objetivos, por='_clave', extrapolar=extrapolar)]
+    if not general.empty:
+        tiempos = objetivos[['tiempo']].drop_duplicates().assign(_clave=CLAVE_GENERAL)
+        valores = interpolar_intercensal(
+            general.assign(_clave=CLAVE_GENERAL), tiempos, por='_clave', extrapolar=extrapolar
+        ).drop(columns='_clave')
+        partes.append(objetivos[['_clave', 'tiempo']].merge(valores, on='tiempo'))
+
+    contexto = pd.concat(partes, ignore_index=True).pivot_table(
+        index=['_clave', 'tiempo'], columns='fuente', values='valor', aggfunc='first'
+    )
+    contexto.columns.name = None
+    contexto = contexto.reset_index()
+
+    # Objetivos sin ninguna observación del INEGI
+    return objetivos[['_clave', 'tiempo']].drop_duplicates().merge(contexto, on=['_clave', 'tiempo'], how='left')
+
+
+def rellenar_huecos(tabla, columnas, por='municipio'):
+    """
+    Rellena nulos con el promedio del mismo `por` y, si sigue faltando, con el
+    promedio de toda la tabla. Vectorizado con transform('mean').
+    """
+    tabla = tabla.copy()
+    medias_grupo = tabla.groupby(por)[columnas].transform('mean')
+    tabla[columnas] = tabla[columnas].fillna(medias_grupo).fillna(tabla[columnas].mean())
+    return tabla
+
+
+def alinear_sep_inegi(sep, inegi, por='municipio', columna_municipio_sep='n_municipi',
+                      columna_ciclo='periodo_escolar', extrapolar=True, rellenar=True):
+    """
+    Agrega a cada fila de la SEP el contexto del INEGI correspondiente a la
+    fecha de su ciclo escolar, en una sola unión.
+
+    `inegi` debe estar en formato largo con columnas [por, 'periodo',
+    'fuente', 'valor'] (como sale de 1_transformacion_datos_inegi); las filas
+    sin municipio (indicadores estatales/nacionales) se reparten a todos los
+    municipios. Regresa la tabla de la SEP con una columna por indicador;
+    las filas cuyo ciclo no se puede interpretar quedan con contexto nulo.
+    """
+    inegi = inegi.copy()
+    inegi['_clave'] = normalizar_nombre(inegi[por])
+    inegi['tiempo'] = parsear_periodos_inegi(inegi['periodo'], grupos=inegi['fuente'])['tiempo']
+
+    sep = sep.copy()
+    sep['_clave'] = normalizar_nombre(sep[columna_municipio_sep])
+    sep['_tiempo'] = parsear_ciclos_escolares(sep[columna_ciclo])
+
+    # Los ciclos que no se pueden fechar quedan sin contexto (merge_asof no acepta nulos)
+    objetivos = sep[['_clave', '_tiempo']].dropna(subset=['_tiempo']).drop_duplicates()
+    objetivos = objetivos.rename(columns={'_tiempo': 'tiempo'})
+    contexto = interpolar_contexto(inegi[['_clave', 'fuente', 'tiempo', 'valor']], objetivos, extrapolar)
+
+    indicadores = [columna for columna in contexto.columns if columna not in ('_clave', 'tiempo')]
+    if rellenar:
+        contexto = rellenar_huecos(contexto, indicadores, por='_clave')
+
+    resultado = sep.merge(
+        contexto.rename(columns={'tiempo': '_tiempo'}), on=['_clave', '_tiempo'], how='left'
+    )
+    return resultado.drop(columns=['_clave', '_tiempo'])
@@ -0,0 +1,359 @@
+"""
+Motor de correlaciones entre indicadores del INEGI y métricas de la SEP.
+
+En lugar de elegir a mano unas cuantas columnas y llamar a df.corr(), aquí
+se cruzan todos los indicadores de los diccionarios diccionario_inegi_*.json
+contra todas las métricas de la SEP (porcentaje de matrícula privada,
+alumnos por docente y crecimiento de la matrícula), para varios rezagos del
+indicador y para cada nivel educativo.
+
+Cada combinación (rezago, nivel, método) es una sola operación matricial:
+las columnas se estandarizan y las sumas necesarias para Pearson se obtienen
+con productos de matrices usando máscaras de datos presentes, de modo que
+cada par (indicador, métrica) usa sus propias observaciones completas sin
+recorrer los pares en Python. Spearman es Pearson sobre rangos.
+
+Los valores p se estiman por permutación (se permutan las filas de las
+métricas dentro de cada ciclo escolar) repartiendo las permutaciones entre
+procesos, y se corrigen por comparaciones múltiples con Benjamini-Hochberg.
+Los indicadores que valen lo mismo para todos los municipios dentro de cada
+ciclo (los estatales y nacionales) solo varían en el tiempo: permutar
+dentro del ciclo nunca cambia su r, así que no se les calcula p ni q y se
+marcan con 'solo_tiempo'; van al final de la tabla.
+
+Uso:
+    python -m src.features.correlaciones
+    python -m src.features.correlaciones --entidad 26 --rezagos 0 1 2 5 --permutaciones 2000
+"""
+
+import argparse
+import json
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from src.data.make_dataset import ENTIDAD_POR_DEFECTO, cargar_entidades, ruta_inegi_tidy
+from src.features.alineacion_temporal import (
+    interpolar_contexto,
+    normalizar_nombre,
+    parsear_ciclos_escolares,
+    parsear_periodos_inegi,
+)
+
+# Obtener la ruta base del proyecto (dos niveles arriba del script)
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent.parent
+
+METRICAS_SEP = ['porcentaje_privado', 'alumnos_por_docente', 'crecimiento_matricula']
+REZAGOS = (0, 1, 2, 5)
+PERMUTACIONES = 1000
+MIN_OBSERVACIONES = 5
+SEMILLA = 42
+
+
+def cargar_indicadores_inegi():
+    """
+    Regresa los nombres de todos los indicadores declarados en los
+    archivos references/diccionario_inegi_*.json.
+    """
+    nombres = []
+    for ruta in sorted((PROJECT_ROOT / 'references').glob('diccionario_inegi_*.json')):
+        with open(ruta, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        for indicadores in config.values():
+            nombres.extend(indicador['nombre'] for indicador in indicadores)
+    return list(dict.fromkeys(nombres))
+
+
+# ============================================================================
+# SECCIÓN 1: PREPARACIÓN DE DATOS
+# ============================================================================
+
+def metricas_sep(sep):
+    """
+    Calcula las métricas de la SEP por (municipio, ciclo, nivel), más un
+    nivel 'TODOS' que agrega todos los niveles.
+    """
+    base = pd.DataFrame({
+        '_clave': normalizar_nombre(sep['n_municipi']),
+        'tiempo': parsear_ciclos_escolares(sep['periodo_escolar']),
+        'nivel': sep['nivel'].astype('string'),
+        'insc_t': sep['insc_t'].astype('float64'),
+        'insc_privado': sep['insc_t'].where(sep['control'].astype('string') == 'PRIVADO', 0).astype('float64'),
+        'tot_doc': sep['tot_doc'].astype('float64'),
+    })
+
+    por_nivel = base.groupby(['_clave', 'tiempo', 'nivel'], observed=True)[['insc_t', 'insc_privado', 'tot_doc']].sum()
+    todos = base.groupby(['_clave', 'tiempo'], observed=True)[['insc_t', 'insc_privado', 'tot_doc']].sum()
+    todos = todos.assign(nivel='TODOS').set_index('nivel', append=True)
+
+    metricas = pd.concat([por_nivel, todos]).sort_index()
+    metricas['porcentaje_privado'] = 100 * metricas['insc_privado'] / metricas['insc_t']
+    metricas['alumnos_por_docente'] = metricas['insc_t'] / metricas['tot_doc']
+    metricas['crecimiento_matricula'] = (
+        metricas.groupby(level=['_clave', 'nivel'])['insc_t'].pct_change(fill_method=None) * 100
+    )
+
+    metricas = metricas[METRICAS_SEP].replace([np.inf, -np.inf], np.nan)
+    return metricas.reset_index()
+
+
+def contexto_con_rezago(inegi, objetivos, rezago):
+    """
+    Valor de cada indicador del INEGI `rezago` años antes de cada
+    (municipio, ciclo) de `objetivos`, interpolado entre observaciones.
+    Los indicadores sin municipio se interpolan una vez y se reparten a
+    todos los municipios.
+    """
+    desplazados = objetivos.assign(tiempo=objetivos['tiempo'] - rezago)
+    contexto = interpolar_contexto(inegi, desplazados)
+    contexto['tiempo'] = contexto['tiempo'] + rezago
+    return contexto
+
+
+# ============================================================================
+# SECCIÓN 2: CORRELACIONES POR LOTE
+# ============================================================================
+
+def estandarizar(A):
+    """
+    Centra y escala cada columna ignorando nulos.
+    """
+    conteo = (~np.isnan(A)).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = np.nansum(A, axis=0) / conteo
+        desviacion = np.sqrt(np.nansum((A - media) ** 2, axis=0) / conteo)
+        desviacion[~(desviacion > 0)] = np.nan
+        return (A - media) / desviacion
+
+
+def rangos(A):
+    """
+    Rangos promedio por columna (los nulos siguen siendo nulos).
+    """
+    return pd.DataFrame(A).rank().to_numpy()
+
+
+def correlacion_por_pares(X, Y, min_obs=MIN_OBSERVACIONES):
+    """
+    Correlación de Pearson entre cada columna de X (n x p) y cada columna de
+    Y (n x q) usando, para cada par, solo las filas donde ambas tienen dato.
+    Todo se calcula con seis productos de matrices. Regresa (r, n) de p x q.
+    """
+    Mx = ~np.isnan(X)
+    My = ~np.isnan(Y)
+    X0 = np.where(Mx, X, 0.0)
+    Y0 = np.where(My, Y, 0.0)
+    Mx = Mx.astype('float64')
+    My = My.astype('float64')
+
+    n = Mx.T @ My
+    sx = X0.T @ My
+    sy = Mx.T @ Y0
+    sxx = (X0 ** 2).T @ My
+    syy = Mx.T @ (Y0 ** 2)
+    sxy = X0.T @ Y0
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        numerador = n * sxy - sx * sy
+        denominador = np.sqrt((n * sxx - sx ** 2) * (n * syy - sy ** 2))
+        r = numerador / denominador
+
+    r[(n < min_obs) | ~(denominador > 0)] = np.nan
+    return np.clip(r, -1, 1), n
+
+
+def constantes_por_ciclo(X, grupos):
+    """
+    Columnas de X que no varían dentro de ningún ciclo (ignorando nulos).
+    La prueba de permutación por ciclo no puede evaluarlas.
+    """
+    return (pd.DataFrame(X).groupby(grupos).nunique().max() <= 1).to_numpy()
+
+
+def permutacion_en_bloques(grupos, rng):
+    """
+    Permutación aleatoria de las filas que solo intercambia filas del mismo
+    grupo (aquí, del mismo ciclo escolar).
+    """
+    base = np.argsort(grupos, kind='stable')
+    mezcla = np.lexsort((rng.random(len(grupos)), grupos))
+    permutacion = np.empty(len(grupos), dtype=np.int64)
+    permutacion[base] = mezcla
+    return permutacion
+
+
+def contar_excesos(X, Y, r_observada, grupos, n_permutaciones, semilla):
+    """
+    Cuenta, para cada par, cuántas permutaciones dan |r| >= |r observada|.
+    Se ejecuta dentro de un proceso del pool.
+    """
+    rng = np.random.default_rng(semilla)
+    excesos = np.zeros(r_observada.shape, dtype=np.int64)
+    umbral = np.abs(r_observada) - 1e-12
+
+    for _ in range(n_permutaciones):
+        r, _ = correlacion_por_pares(X, Y[permutacion_en_bloques(grupos, rng)])
+        excesos += np.abs(r) >= umbral
+
+    return excesos
+
+
+def numero_trabajos(n_permutaciones, procesos=None):
+    """
+    En cuántos trabajos (con semilla propia) se reparten las permutaciones.
+    """
+    return max(1, min(procesos or 4, n_permutaciones))
+
+
+def valores_p_permutacion(X, Y, r_observada, grupos, pool, n_permutaciones=PERMUTACIONES,
+                          semilla=SEMILLA, procesos=None):
+    """
+    Valores p por permutación para todos los pares a la vez. Las
+    permutaciones se reparten entre los procesos de `pool` (compartido por
+    todo el escaneo) con semillas independientes.
+    """
+    if n_permutaciones <= 0:
+        return np.full(r_observada.shape, np.nan)
+
+    n_trabajos = numero_trabajos(n_permutaciones, procesos)
+    cuotas = np.diff(np.linspace(0, n_permutaciones, n_trabajos + 1).astype(int))
+    semillas = np.random.SeedSequence(semilla).spawn(n_trabajos)
+
+    futuros = [
+        pool.submit(contar_excesos, X, Y, r_observada, grupos, int(cuota), semilla_trabajo)
+        for cuota, semilla_trabajo in zip(cuotas, semillas)
+    ]
+    excesos = sum(futuro.result() for futuro in futuros)
+
+    p = (excesos + 1) / (n_permutaciones + 1)
+    p[np.isnan(r_observada)] = np.nan
+    return p
+
+
+def ajustar_benjamini_hochberg(p):
+    """
+    Valores q de Benjamini-Hochberg (tasa de falsos descubrimientos).
+    """
+    p = np.asarray(p, dtype='float64')
+    q = np.full(p.shape, np.nan)
+    validos = np.isfinite(p)
+    m = validos.sum()
+    if m == 0:
+        return q
+
+    orden = np.argsort(p[validos])
+    escalados = p[validos][orden] * m / np.arange(1, m + 1)
+    escalados = np.minimum.accumulate(escalados[::-1])[::-1]
+
+    q_validos = np.empty(m)
+    q_validos[orden] = np.minimum(escalados, 1.0)
+    q[validos] = q_validos
+    return q
+
+
+# ============================================================================
+# SECCIÓN 3: ESCANEO
+# ============================================================================
+
+def escanear_correlaciones(sep, inegi, rezagos=REZAGOS, n_permutaciones=PERMUTACIONES,
+                           semilla=SEMILLA, procesos=None):
+    """
+    Cruza todos los indicadores del INEGI contra todas las métricas de la
+    SEP para cada rezago, nivel y método (Pearson y Spearman).
+
+    `sep` es la tabla tidy del Formato 911; `inegi` es la tabla tidy larga
+    del INEGI (municipio, periodo, valor, fuente). Regresa una tabla con
+    r, n, p de permutación y q de Benjamini-Hochberg, ordenada por |r|
+    entre los pares que la prueba puede evaluar; los pares 'solo_tiempo'
+    (p y q nulos) van después.
+    """
+    indicadores = [nombre for nombre in cargar_indicadores_inegi() if nombre in set(inegi['fuente'])]
+
+    inegi = inegi[inegi['fuente'].isin(indicadores)].copy()
+    inegi['_clave'] = normalizar_nombre(inegi['municipio'])
+    inegi['tiempo'] = parsear_periodos_inegi(inegi['periodo'], grupos=inegi['fuente'])['tiempo']
+    inegi = inegi[['_clave', 'fuente', 'tiempo', 'valor']]
+
+    metricas = metricas_sep(sep)
+    objetivos = metricas[['_clave', 'tiempo']].drop_duplicates()
+
+    resultados = []
+    # Un solo pool para todo el escaneo en lugar de uno por combinación
+    with ProcessPoolExecutor(max_workers=numero_trabajos(n_permutaciones, procesos)) as pool:
+        for rezago in rezagos:
+            contexto = contexto_con_rezago(inegi, objetivos, rezago)
+            tabla = metricas.merge(contexto, on=['_clave', 'tiempo'], how='left')
+            columnas_x = [nombre for nombre in indicadores if nombre in tabla.columns]
+
+            for nivel, grupo in tabla.groupby('nivel', observed=True):
+                X = grupo[columnas_x].to_numpy('float64')
+                Y = grupo[METRICAS_SEP].to_numpy('float64')
+                ciclos = grupo['tiempo'].to_numpy()
+                solo_tiempo = constantes_por_ciclo(X, ciclos)
+
+                for metodo, transformar in (('pearson', estandarizar), ('spearman', rangos)):
+                    Xt, Yt = transformar(X), transformar(Y)
+                    r, n = correlacion_por_pares(Xt, Yt)
+
+                    # Solo se permutan los indicadores que varían dentro del ciclo
+                    p = np.full(r.shape, np.nan)
+                    if not solo_tiempo.all():
+                        p[~solo_tiempo] = valores_p_permutacion(Xt[:, ~solo_tiempo], Yt, r[~solo_tiempo], ciclos,
+                                                                pool, n_permutaciones, semilla, procesos)
+
+                    indice = pd.MultiIndex.from_product([columnas_x, METRICAS_SEP], names=['indicador', 'metrica'])
+                    resultados.append(pd.DataFrame({
+                        'r': r.ravel(), 'n': n.ravel().astype(int), 'p_permutacion': p.ravel(),
+                        'solo_tiempo': np.repeat(solo_tiempo, len(METRICAS_SEP)),
+                    }, index=indice).reset_index().assign(rezago=rezago, nivel=nivel, metodo=metodo))
+
+    escaneo = pd.concat(resultados, ignore_index=True).dropna(subset=['r'])
+    escaneo['q_bh'] = ajustar_benjamini_hochberg(escaneo['p_permutacion'])
+    escaneo = escaneo.assign(_abs_r=escaneo['r'].abs()).sort_values(
+        ['solo_tiempo', '_abs_r'], ascending=[True, False], kind='stable'
+    )
+
+    columnas = ['indicador', 'metrica', 'nivel', 'rezago', 'metodo', 'r', 'n', 'p_permutacion', 'q_bh', 'solo_tiempo']
+    return escaneo[columnas].reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escanea correlaciones INEGI x SEP.")
+    parser.add_argument('--entidad', default=ENTIDAD_POR_DEFECTO,
+                        help="Clave de la entidad (por omisión, Sonora).")
+    parser.add_argument('--rezagos', type=float, nargs='+', default=list(REZAGOS),
+                        help="Rezagos del indicador en años.")
+    parser.add_argument('--permutaciones', type=int, default=PERMUTACIONES,
+                        help="Permutaciones para los valores p (0 para omitirlos).")
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="Procesos para las permutaciones.")
+    argumentos = parser.parse_args()
+
+    try:
+        entidad = cargar_entidades()[argumentos.entidad.zfill(2)]
+        print(f"\n--- Escaneando correlaciones INEGI x SEP de {entidad['nombre']} ---")
+
+        ruta_sep = PROJECT_ROOT / 'data' / 'processed' / f"sep_datos_tidy_{entidad['slug']}.csv"
+        ruta_inegi = ruta_inegi_tidy(entidad['slug'])
+        sep = pd.read_csv(ruta_sep, usecols=['n_municipi', 'periodo_escolar', 'nivel', 'control', 'insc_t', 'tot_doc'])
+        inegi = pd.read_csv(ruta_inegi, dtype={'periodo': str})
+
+        escaneo = escanear_correlaciones(sep, inegi, argumentos.rezagos, argumentos.permutaciones,
+                                         procesos=argumentos.procesos)
+
+        ruta_tablas = PROJECT_ROOT / 'reports' / 'tables'
+        ruta_tablas.mkdir(parents=True, exist_ok=True)
+        ruta_guardado = ruta_tablas / f"correlaciones_escaneo_{entidad['slug']}.csv"
+        escaneo.to_csv(ruta_guardado, index=False, encoding='utf-8')
+
+        print(f" -> ✅ {len(escaneo)} pares guardados en: {ruta_guardado}")
+        print(escaneo.head(10).to_string(index=False))
+
+    except Exception as e:
+        print(f"❌ Ocurrió un error al escanear correlaciones: {e}")
+
+
+if __name__ == "__main__":
+    main()
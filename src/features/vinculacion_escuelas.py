@@ -0,0 +1,231 @@
+"""
+Vinculación escuela a escuela entre el Formato 911 y el catálogo de centros
+de trabajo.
+
+El Formato 911 identifica a cada escuela por 'clavecct' y 'n_cct'; el
+catálogo por 'cv_cct' y 'c_nombre', y además trae el estatus (activa,
+inactiva) y las coordenadas. Este módulo construye una tabla de vínculos
+clavecct -> cv_cct en dos pasos:
+
+1. Unión exacta por CCT normalizada (un merge de pandas, es decir, un hash
+   join).
+2. Para las CCT que no aparecen en el catálogo (escuelas renombradas o dadas
+   de baja y recapturadas con otra clave), búsqueda difusa por nombre: se
+   vectorizan los nombres con TF-IDF de trigramas de caracteres y solo se
+   comparan escuelas del mismo municipio (bloqueo), así que el costo crece
+   con el tamaño de cada municipio y no con todos los pares posibles.
+
+La tabla de vínculos se guarda en data/processed/vinculo_escuelas_<entidad>.csv
+y anexar_catalogo() la usa para pegar estatus y coordenadas a cada fila
+del Formato 911.
+
+Uso:
+    python -m src.features.vinculacion_escuelas
+    python -m src.features.vinculacion_escuelas --entidad 02 --umbral 0.85
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from src.data.make_dataset import ENTIDAD_POR_DEFECTO, cargar_entidades
+from src.features.alineacion_temporal import normalizar_nombre
+
+# Obtener la ruta base del proyecto (dos niveles arriba del script)
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent.parent
+
+# Similitud coseno mínima para aceptar un vínculo por nombre
+UMBRAL_SIMILITUD = 0.8
+
+# Columnas del catálogo que se anexan a cada escuela del Formato 911
+COLUMNAS_CATALOGO = ['cv_cct', 'c_nombre', 'cv_estatus', 'c_estatus', 'latitud', 'longitud']
+
+
+def reparar_mojibake(serie):
+    """
+    Corrige textos UTF-8 que se leyeron como latin1 ('EDUCACIÃ\\x93N' ->
+    'EDUCACIÓN'), como los que deja la descarga del catálogo. Se trabaja
+    sobre los valores únicos, así que el costo depende de cuántos nombres
+    distintos hay y no del número de filas.
+    """
+    def reparar(texto):
+        try:
+            return texto.encode('latin1').decode('utf-8')
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            return texto
+
+    unicos = serie.dropna().unique()
+    return serie.map({texto: reparar(texto) for texto in unicos})
+
+
+def normalizar_cct(serie):
+    """
+    Normaliza claves de centro de trabajo: texto, mayúsculas, sin espacios.
+    """
+    return serie.astype('string').str.strip().str.upper().str.replace(' ', '', regex=False)
+
+
+def escuelas_911(sep):
+    """
+    Reduce la tabla tidy del Formato 911 a una fila por escuela (CCT), con
+    su nombre y su clave de municipio.
+    """
+    escuelas = sep[['clavecct', 'n_cct', 'municipio']].copy()
+    escuelas['cct'] = normalizar_cct(escuelas['clavecct'])
+    escuelas['nombre_norm'] = normalizar_nombre(escuelas['n_cct'])
+    escuelas['municipio'] = pd.to_numeric(escuelas['municipio'], errors='coerce').astype('Int32')
+    return escuelas.drop_duplicates('cct')[['cct', 'nombre_norm', 'municipio']]
+
+
+def escuelas_catalogo(catalogo):
+    """
+    Prepara el catálogo de centros de trabajo con la CCT y el nombre
+    normalizados y la clave de municipio del inmueble.
+    """
+    escuelas = catalogo[COLUMNAS_CATALOGO + ['inmueble_cv_mun']].copy()
+    escuelas['c_nombre'] = reparar_mojibake(escuelas['c_nombre'].astype('string'))
+    escuelas['cct_catalogo'] = normalizar_cct(escuelas['cv_cct'])
+    escuelas['nombre_norm'] = normalizar_nombre(escuelas['c_nombre'])
+    escuelas['municipio'] = pd.to_numeric(escuelas['inmueble_cv_mun'], errors='coerce').astype('Int32')
+    return escuelas.drop_duplicates('cct_catalogo')
+
+
+def vincular_difuso(pendientes, candidatos, umbral=UMBRAL_SIMILITUD):
+    """
+    Busca, para cada escuela pendiente, el nombre más parecido del catálogo
+    dentro de su mismo municipio.
+
+    Los nombres de ambos lados se vectorizan una sola vez con un vocabulario
+    común de trigramas de caracteres; luego cada municipio es un producto
+    disperso (pendientes x candidatos) del que se toma el máximo por fila.
+    """
+    columnas = ['cct', 'cct_catalogo', 'similitud']
+    pendientes = pendientes.dropna(subset=['nombre_norm', 'municipio'])
+    candidatos = candidatos.dropna(subset=['nombre_norm', 'municipio'])
+
+    if pendientes.empty or candidatos.empty:
+        return pd.DataFrame(columns=columnas)
+
+    vectorizador = TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 3), dtype=np.float32)
+    vectorizador.fit(pd.concat([pendientes['nombre_norm'], candidatos['nombre_norm']]).astype(str))
+    X_pendientes = vectorizador.transform(pendientes['nombre_norm'].astype(str))
+    X_candidatos = vectorizador.transform(candidatos['nombre_norm'].astype(str))
+
+    # Posiciones de cada municipio en ambas tablas
+    bloques_pendientes = pd.Series(np.arange(len(pendientes))).groupby(pendientes['municipio'].to_numpy()).indices
+    bloques_candidatos = pd.Series(np.arange(len(candidatos))).groupby(candidatos['municipio'].to_numpy()).indices
+
+    cct_pendientes = pendientes['cct'].to_numpy()
+    cct_candidatos = candidatos['cct_catalogo'].to_numpy()
+
+    vinculos = []
+    for municipio, filas in bloques_pendientes.items():
+        columnas_bloque = bloques_candidatos.get(municipio)
+        if columnas_bloque is None:
+            continue
+
+        similitud = (X_pendientes[filas] @ X_candidatos[columnas_bloque].T).toarray()
+        mejor = similitud.argmax(axis=1)
+        valor = similitud[np.arange(len(filas)), mejor]
+        aceptado = valor >= umbral
+
+        vinculos.append(pd.DataFrame({
+            'cct': cct_pendientes[filas[aceptado]],
+            'cct_catalogo': cct_candidatos[columnas_bloque[mejor[aceptado]]],
+            'similitud': valor[aceptado],
+        }))
+
+    if not vinculos:
+        return pd.DataFrame(columns=columnas)
+    return pd.concat(vinculos, ignore_index=True)
+
+
+def construir_vinculos(sep, catalogo, umbral=UMBRAL_SIMILITUD):
+    """
+    Construye la tabla de vínculos clavecct -> cv_cct con columnas
+    cct, cct_catalogo, metodo ('exacto', 'difuso' o nulo) y similitud.
+    """
+    escuelas = escuelas_911(sep)
+    candidatos = escuelas_catalogo(catalogo)
+
+    exactos = escuelas.merge(
+        candidatos[['cct_catalogo']], left_on='cct', right_on='cct_catalogo', how='left'
+    )
+    exactos['metodo'] = np.where(exactos['cct_catalogo'].notna(), 'exacto', None)
+    exactos['similitud'] = np.where(exactos['cct_catalogo'].notna(), 1.0, np.nan)
+
+    # Solo se buscan por nombre las escuelas del catálogo que no quedaron tomadas
+    pendientes = exactos[exactos['cct_catalogo'].isna()]
+    libres = candidatos[~candidatos['cct_catalogo'].isin(exactos['cct_catalogo'])]
+    difusos = vincular_difuso(pendientes, libres, umbral)
+
+    difusos = difusos.set_index('cct')
+    vinculos = exactos.set_index('cct')
+    sin_vinculo = vinculos['cct_catalogo'].isna() & vinculos.index.isin(difusos.index)
+    vinculos.loc[sin_vinculo, 'cct_catalogo'] = difusos['cct_catalogo']
+    vinculos.loc[sin_vinculo, 'similitud'] = difusos['similitud']
+    vinculos.loc[sin_vinculo, 'metodo'] = 'difuso'
+
+    return vinculos.reset_index()[['cct', 'cct_catalogo', 'metodo', 'similitud']]
+
+
+def anexar_catalogo(sep, vinculos, catalogo):
+    """
+    Pega a cada fila del Formato 911 el estatus y las coordenadas de su
+    escuela en el catálogo, usando la tabla de vínculos.
+    """
+    candidatos = escuelas_catalogo(catalogo)[['cct_catalogo'] + COLUMNAS_CATALOGO]
+    sep = sep.copy()
+    sep['cct'] = normalizar_cct(sep['clavecct'])
+    sep = sep.merge(vinculos, on='cct', how='left').merge(candidatos, on='cct_catalogo', how='left')
+    return sep.drop(columns=['cct'])
+
+
+def vincular_entidad(clave_entidad=ENTIDAD_POR_DEFECTO, umbral=UMBRAL_SIMILITUD):
+    """
+    Construye y guarda la tabla de vínculos de una entidad a partir de su
+    tabla tidy del Formato 911 y su catálogo de escuelas.
+    """
+    entidad = cargar_entidades()[clave_entidad]
+    print(f"\n--- Vinculando escuelas del Formato 911 con el catálogo de {entidad['nombre']} ---")
+
+    ruta_sep = PROJECT_ROOT / 'data' / 'processed' / f"sep_datos_tidy_{entidad['slug']}.csv"
+    ruta_catalogo = PROJECT_ROOT / 'data' / 'raw' / f"catalogo_escuelas_{entidad['slug']}.csv"
+    for ruta in (ruta_sep, ruta_catalogo):
+        if not ruta.exists():
+            raise Exception(f"Error: No existe {ruta}. Ejecuta primero python -m src.data.make_dataset")
+
+    sep = pd.read_csv(ruta_sep, usecols=['clavecct', 'n_cct', 'municipio'])
+    catalogo = pd.read_csv(ruta_catalogo, usecols=COLUMNAS_CATALOGO + ['inmueble_cv_mun'], low_memory=False)
+
+    vinculos = construir_vinculos(sep, catalogo, umbral)
+
+    ruta_guardado = PROJECT_ROOT / 'data' / 'processed' / f"vinculo_escuelas_{entidad['slug']}.csv"
+    vinculos.to_csv(ruta_guardado, index=False, encoding='utf-8')
+
+    conteo = vinculos['metodo'].value_counts(dropna=False)
+    print(f" -> ✅ Vínculos guardados en: {ruta_guardado}")
+    print(f"   Exactos: {conteo.get('exacto', 0)} | Difusos: {conteo.get('difuso', 0)} | "
+          f"Sin vínculo: {vinculos['metodo'].isna().sum()}")
+    return vinculos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vincula el Formato 911 con el catálogo de escuelas.")
+    parser.add_argument('--entidad', default=ENTIDAD_POR_DEFECTO,
+                        help="Clave de la entidad (por omisión, Sonora).")
+    parser.add_argument('--umbral', type=float, default=UMBRAL_SIMILITUD,
+                        help="Similitud mínima para aceptar un vínculo por nombre.")
+    argumentos = parser.parse_args()
+
+    try:
+        vincular_entidad(argumentos.entidad.zfill(2), argumentos.umbral)
+    except Exception as e:
+        print(f"❌ Ocurrió un error al vincular escuelas: {e}")
+
+
+if __name__ == "__main__":
+    main()
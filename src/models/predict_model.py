@@ -0,0 +1,113 @@
+"""
+Pronóstico de matrícula a partir de los parámetros guardados por
+train_model.py.
+
+El pronóstico de Holt a h ciclos es nivel_suavizado + h * tendencia, así que todas
+las series se pronostican con una sola operación sobre los arreglos de
+parámetros. Solo se pronostican las series observadas en el último ciclo;
+las que dejaron de reportar antes (escuelas cerradas, niveles que ya no
+se ofrecen en el municipio) no se prolongan. El resultado se guarda en
+data/processed/pronostico_matricula_<entidad>.csv y se resume el
+crecimiento esperado de la matrícula pública contra la privada.
+
+Uso:
+    python -m src.models.predict_model
+    python -m src.models.predict_model --entidad 02 --ciclos 3
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from src.data.make_dataset import ENTIDAD_POR_DEFECTO, cargar_entidades
+from src.models.train_model import LLAVES_SERIE
+
+# Obtener la ruta base del proyecto (dos niveles arriba del script)
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent.parent
+
+
+def ciclos_siguientes(ultimo_ciclo, n_ciclos):
+    """
+    Genera las etiquetas de los n ciclos posteriores a `ultimo_ciclo`
+    ('2023-2024' -> ['2024-2025', '2025-2026', ...]).
+    """
+    inicio = int(ultimo_ciclo.split('-')[0])
+    return [f'{inicio + h}-{inicio + h + 1}' for h in range(1, n_ciclos + 1)]
+
+
+def pronosticar(parametros, n_ciclos=2):
+    """
+    Pronostica `n_ciclos` adelante para todas las series observadas en el
+    último ciclo a la vez. Regresa una tabla larga con las llaves de la
+    serie, el ciclo y la matrícula pronosticada (no negativa).
+    """
+    parametros = parametros[parametros['ultimo_valor'].notna()]
+    horizonte = np.arange(1, n_ciclos + 1)
+    valores = parametros['nivel_suavizado'].to_numpy()[:, None] + horizonte * parametros['tendencia'].to_numpy()[:, None]
+    valores = np.clip(valores, 0, None)
+
+    # Todas las series de una entidad comparten el último ciclo observado
+    ciclos = ciclos_siguientes(str(parametros['ultimo_ciclo'].iloc[0]), n_ciclos)
+
+    pronostico = pd.DataFrame(valores, columns=ciclos)
+    pronostico[LLAVES_SERIE] = parametros[LLAVES_SERIE].to_numpy()
+    return pronostico.melt(id_vars=LLAVES_SERIE, var_name='periodo_escolar', value_name='insc_t_pronostico')
+
+
+def resumir_por_control(parametros, pronostico):
+    """
+    Compara la matrícula observada en el último ciclo con la pronosticada,
+    por tipo de control (PÚBLICO / PRIVADO). Numerador y denominador
+    cubren las mismas series: las observadas en el último ciclo.
+    """
+    parametros = parametros[parametros['ultimo_valor'].notna()]
+    observado = parametros.groupby('control')['ultimo_valor'].sum()
+    futuro = pronostico.groupby(['control', 'periodo_escolar'])['insc_t_pronostico'].sum().unstack()
+    resumen = futuro.div(observado, axis=0).sub(1).mul(100)
+    resumen.columns = [f'crecimiento_%_{ciclo}' for ciclo in resumen.columns]
+    return resumen
+
+
+def predecir(clave_entidad=ENTIDAD_POR_DEFECTO, n_ciclos=2):
+    """
+    Carga los parámetros de una entidad, pronostica y guarda el resultado.
+    """
+    entidad = cargar_entidades()[clave_entidad]
+    print(f"\n--- Pronosticando matrícula de {entidad['nombre']} ({n_ciclos} ciclos) ---")
+
+    ruta_parametros = PROJECT_ROOT / 'models' / f"holt_matricula_{entidad['slug']}.csv"
+    if not ruta_parametros.exists():
+        raise Exception(f"Error: No existe {ruta_parametros}. Ejecuta primero python -m src.models.train_model")
+
+    parametros = pd.read_csv(ruta_parametros)
+    pronostico = pronosticar(parametros, n_ciclos)
+
+    ruta_processed = PROJECT_ROOT / 'data' / 'processed'
+    ruta_processed.mkdir(parents=True, exist_ok=True)
+    ruta_guardado = ruta_processed / f"pronostico_matricula_{entidad['slug']}.csv"
+    pronostico.to_csv(ruta_guardado, index=False, encoding='utf-8')
+
+    print(f" -> ✅ Pronóstico guardado en: {ruta_guardado}")
+    print("\nCrecimiento esperado respecto al último ciclo observado:")
+    print(resumir_por_control(parametros, pronostico).round(2))
+    return pronostico
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pronostica la matrícula por serie.")
+    parser.add_argument('--entidad', default=ENTIDAD_POR_DEFECTO,
+                        help="Clave de la entidad (por omisión, Sonora).")
+    parser.add_argument('--ciclos', type=int, default=2,
+                        help="Número de ciclos a pronosticar.")
+    argumentos = parser.parse_args()
+
+    try:
+        predecir(argumentos.entidad.zfill(2), argumentos.ciclos)
+    except Exception as e:
+        print(f"❌ Ocurrió un error al pronosticar: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Ajuste de modelos de pronóstico de matrícula.
+
+Cada serie es la matrícula total (insc_t) de una combinación
+(municipio, nivel, control) a lo largo de los ciclos escolares. Son miles
+de series muy cortas, así que en lugar de ajustar una por una se ajusta un
+suavizamiento exponencial de Holt (nivel + tendencia) a todas a la vez:
+las series forman una matriz series x ciclos y la recursión se evalúa
+para toda la matriz y para toda la malla de parámetros (alpha, beta) en
+una sola pasada de numpy por ciclo. Para cada serie se elige la pareja de
+parámetros con menor error cuadrático de pronóstico a un paso.
+
+Con menos de MIN_OBS_HOLT observaciones el error no distingue entre
+parámetros (con dos datos toda la malla empata y se quedaría con beta=0,
+congelando la tendencia), así que esas series usan su último valor y la
+pendiente observada entre su primer y último dato.
+
+Los parámetros, el último nivel y la tendencia de cada serie se guardan en
+models/holt_matricula_<entidad>.csv para que predict_model.py pronostique
+sin volver a ajustar.
+
+Uso:
+    python -m src.models.train_model
+    python -m src.models.train_model --entidad 02
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from src.data.make_dataset import ENTIDAD_POR_DEFECTO, cargar_entidades
+
+# Obtener la ruta base del proyecto (dos niveles arriba del script)
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent.parent
+
+# Columnas que identifican una serie de matrícula
+LLAVES_SERIE = ['n_municipi', 'nivel', 'control']
+
+# Malla de parámetros del suavizamiento de Holt
+ALPHAS = np.linspace(0.1, 1.0, 10)
+BETAS = np.linspace(0.0, 1.0, 11)
+
+# Observaciones mínimas para elegir alpha y beta por error de pronóstico
+MIN_OBS_HOLT = 3
+
+
+def construir_series(sep, valor='insc_t'):
+    """
+    Agrega la tabla tidy de la SEP a una matriz de series: una fila por
+    (municipio, nivel, control), una columna por ciclo escolar (ordenados).
+    Los ciclos sin dato quedan como NaN.
+    """
+    series = (
+        sep.groupby(LLAVES_SERIE + ['periodo_escolar'], observed=True)[valor]
+        .sum(min_count=1)
+        .unstack('periodo_escolar')
+        .sort_index(axis=1)
+    )
+    series.columns = series.columns.astype(str)
+    return series.astype('float64')
+
+
+def ajustar_holt_lote(Y, alphas=ALPHAS, betas=BETAS):
+    """
+    Ajusta Holt (tendencia aditiva) a todas las filas de Y (series x tiempo)
+    y para toda la malla alphas x betas a la vez.
+
+    Cada serie arranca en su primer valor observado con tendencia cero; los
+    ciclos faltantes avanzan el nivel con la tendencia sin actualizarlo.
+    Las series con menos de MIN_OBS_HOLT observaciones no se ajustan
+    (alpha, beta y sse nulos): su tendencia es la pendiente entre su primer
+    y último dato y su nivel, el último dato llevado con esa pendiente hasta
+    el último ciclo.
+
+    Regresa un DataFrame con alpha, beta, nivel_suavizado, tendencia, sse
+    y n_obs por serie (mismo orden que las filas de Y). El nivel se llama
+    'nivel_suavizado' para no chocar con la columna 'nivel' educativo.
+    """
+    Y = np.asarray(Y, dtype='float64')
+    n_series, n_ciclos = Y.shape
+
+    malla_a, malla_b = np.meshgrid(alphas, betas, indexing='ij')
+    a = malla_a.ravel()[None, :]
+    b = malla_b.ravel()[None, :]
+    n_malla = a.shape[1]
+
+    nivel = np.zeros((n_series, n_malla))
+    tendencia = np.zeros((n_series, n_malla))
+    sse = np.zeros((n_series, n_malla))
+    iniciada = np.zeros(n_series, dtype=bool)
+
+    for t in range(n_ciclos):
+        y = Y[:, t][:, None]
+        observado = ~np.isnan(Y[:, t])
+        arranca = observado & ~iniciada
+        actualiza = (observado & iniciada)[:, None]
+
+        pronostico = nivel + tendencia
+        error = np.where(actualiza, y - pronostico, 0.0)
+        sse += error ** 2
+
+        nivel_nuevo = np.where(actualiza, a * y + (1 - a) * pronostico, pronostico)
+        tendencia = np.where(actualiza, b * (nivel_nuevo - nivel) + (1 - b) * tendencia, tendencia)
+        nivel = nivel_nuevo
+
+        nivel[arranca] = Y[arranca, t][:, None]
+        tendencia[arranca] = 0.0
+        iniciada |= observado
+
+    mejor = np.argmin(sse, axis=1)
+    filas = np.arange(n_series)
+
+    ajuste = pd.DataFrame({
+        'alpha': a[0, mejor],
+        'beta': b[0, mejor],
+        'nivel_suavizado': nivel[filas, mejor],
+        'tendencia': tendencia[filas, mejor],
+        'sse': sse[filas, mejor],
+        'n_obs': (~np.isnan(Y)).sum(axis=1),
+    })
+
+    # Series cortas: último valor más la pendiente observada
+    cortas = (ajuste['n_obs'] < MIN_OBS_HOLT).to_numpy() & iniciada
+    if cortas.any():
+        Y_cortas = Y[cortas]
+        observado = ~np.isnan(Y_cortas)
+        posiciones = np.arange(n_ciclos)
+        primero = np.where(observado, posiciones, n_ciclos).min(axis=1)
+        ultimo = np.where(observado, posiciones, -1).max(axis=1)
+        filas_cortas = np.arange(len(Y_cortas))
+        distancia = np.maximum(ultimo - primero, 1)
+
+        pendiente = (Y_cortas[filas_cortas, ultimo] - Y_cortas[filas_cortas, primero]) / distancia
+
+        ajuste.loc[cortas, ['alpha', 'beta', 'sse']] = np.nan
+        ajuste.loc[cortas, 'tendencia'] = pendiente
+        ajuste.loc[cortas, 'nivel_suavizado'] = Y_cortas[filas_cortas, ultimo] + pendiente * (n_ciclos - 1 - ultimo)
+
+    return ajuste
+
+
+def entrenar(clave_entidad=ENTIDAD_POR_DEFECTO):
+    """
+    Lee la tabla tidy de la SEP de una entidad, ajusta todas las series y
+    guarda los parámetros en models/.
+    """
+    entidad = cargar_entidades()[clave_entidad]
+    print(f"\n--- Ajustando pronóstico de matrícula de {entidad['nombre']} ---")
+
+    ruta_sep = PROJECT_ROOT / 'data' / 'processed' / f"sep_datos_tidy_{entidad['slug']}.csv"
+    if not ruta_sep.exists():
+        raise Exception(f"Error: No existe {ruta_sep}. Ejecuta primero python -m src.data.make_dataset")
+
+    sep = pd.read_csv(ruta_sep, usecols=LLAVES_SERIE + ['periodo_escolar', 'insc_t'])
+    series = construir_series(sep)
+    print(f"Series a ajustar: {len(series)} ({series.shape[1]} ciclos)")
+
+    parametros = ajustar_holt_lote(series.to_numpy())
+    parametros.index = series.index
+    parametros['ultimo_ciclo'] = series.columns[-1]
+    parametros['ultimo_valor'] = series.iloc[:, -1].to_numpy()
+
+    ruta_models = PROJECT_ROOT / 'models'
+    ruta_models.mkdir(parents=True, exist_ok=True)
+    ruta_guardado = ruta_models / f"holt_matricula_{entidad['slug']}.csv"
+    parametros.reset_index().to_csv(ruta_guardado, index=False, encoding='utf-8')
+
+    print(f" -> ✅ Parámetros guardados en: {ruta_guardado}")
+    return parametros
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ajusta el pronóstico de matrícula por serie.")
+    parser.add_argument('--entidad', default=ENTIDAD_POR_DEFECTO,
+                        help="Clave de la entidad (por omisión, Sonora).")
+    argumentos = parser.parse_args()
+
+    try:
+        entrenar(argumentos.entidad.zfill(2))
+    except Exception as e:
+        print(f"❌ Ocurrió un error al ajustar el modelo: {e}")
+
+
+if __name__ == "__main__":
+    main()